@@ -22,12 +22,14 @@ celery = Celery(
 celery.conf.update(app.config)
 
 # Import tasks after Celery is configured to avoid circular imports
-from tasks import process_search_request, search_yandex_maps, search_2gis
+from tasks import process_search_request, search_yandex_maps, search_2gis, prime_satellite_tile_cache
 
 @worker_ready.connect
 def on_worker_ready(**_):
     """Handler for when the worker is ready."""
     app.logger.info('Celery worker is ready')
+    if os.getenv('ROSCOSMOS_PRIME_TILE_CACHE', 'false').lower() == 'true':
+        prime_satellite_tile_cache.delay()
 
 @worker_shutdown.connect
 def on_worker_shutdown(**_):
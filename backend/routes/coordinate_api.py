@@ -3,7 +3,7 @@ import os
 import time
 import logging
 from werkzeug.utils import secure_filename
-from services.coordinate_detector import CoordinateDetector
+from services.coordinate_detector import get_shared_coordinate_detector
 from services.video_coordinate_detector import VideoCoordinateDetector
 from models import db, Photo, Violation, DetectedObject
 
@@ -37,7 +37,7 @@ def get_coordinate_detector():
     """Get or create coordinate detector instance."""
     global _coordinate_detector
     if _coordinate_detector is None:
-        _coordinate_detector = CoordinateDetector()
+        _coordinate_detector = get_shared_coordinate_detector()
         logger.info("📍 Coordinate detector instance created for API")
     return _coordinate_detector
 
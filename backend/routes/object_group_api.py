@@ -2,7 +2,7 @@ from flask import Blueprint, request, jsonify, current_app
 import os
 import logging
 from werkzeug.utils import secure_filename
-from services.coordinate_detector import CoordinateDetector
+from services.coordinate_detector import get_shared_coordinate_detector
 from services.video_coordinate_detector import VideoCoordinateDetector
 from models import db, Photo, DetectedObject
 import json
@@ -21,7 +21,7 @@ def get_coordinate_detector():
     """Get or create coordinate detector instance."""
     global _coordinate_detector
     if _coordinate_detector is None:
-        _coordinate_detector = CoordinateDetector()
+        _coordinate_detector = get_shared_coordinate_detector()
     return _coordinate_detector
 
 def get_video_detector():
@@ -63,7 +63,7 @@ def get_property_info(cadastral_number):
         
         return jsonify({
             'success': True,
-            'property': property_info.__dict__
+            'property': property_info.to_dict()
         })
         
     except Exception as e:
@@ -98,7 +98,7 @@ def search_by_coordinates():
         properties = sync_get_properties_by_coordinates(lat, lon, radius)
         
         # Convert PropertyInfo objects to dictionaries
-        properties_data = [prop.__dict__ for prop in properties]
+        properties_data = [prop.to_dict() for prop in properties]
         
         return jsonify({
             'success': True,
@@ -177,14 +177,14 @@ def analyze_location():
         
         # Get properties in the area
         properties = sync_get_properties_by_coordinates(lat, lon, radius=50)
-        properties_data = [prop.__dict__ for prop in properties]
+        properties_data = [prop.to_dict() for prop in properties]
         
         # Analyze each property for potential violations
         analysis_results = []
         for prop in properties:
             # Basic property analysis
             property_analysis = {
-                'property': prop.__dict__,
+                'property': prop.to_dict(),
                 'risk_factors': [],
                 'compliance_status': 'unknown'
             }
@@ -196,7 +196,7 @@ def analyze_location():
             if prop.area > 5000:
                 property_analysis['risk_factors'].append('large_area')
             
-            if 'жилая' in prop.permitted_use.lower() and any(word in prop.address.lower() 
+            if 'жилая' in prop.permitted_use_lower and any(word in prop.address_lower 
                 for word in ['магазин', 'офис', 'салон', 'кафе']):
                 property_analysis['risk_factors'].append('potential_usage_violation')
             
@@ -1,7 +1,11 @@
 import redis
+import redis.asyncio as aioredis
+import asyncio
+import inspect
 import json
 import hashlib
 import logging
+import weakref
 from typing import Any, Optional, Dict, List
 from datetime import datetime, timedelta
 import pickle
@@ -37,6 +41,9 @@ class CacheService:
         except Exception as e:
             logger.error(f"Failed to connect to Redis: {str(e)}")
             self.redis_client = None
+        
+        # Async clients are bound to the event loop they were created on
+        self._async_clients = weakref.WeakKeyDictionary()
     
     def _generate_key(self, prefix: str, *args, **kwargs) -> str:
         """Generate a unique cache key from arguments."""
@@ -71,12 +78,53 @@ class CacheService:
         
         try:
             ttl = ttl or self.default_ttl
-            serialized_value = pickle.dumps(value)
+            serialized_value = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
             return self.redis_client.setex(key, ttl, serialized_value)
         except Exception as e:
             logger.error(f"Cache set error for key {key}: {str(e)}")
             return False
     
+    def _get_async_client(self):
+        """Get or create the asyncio Redis client for the running event loop."""
+        if not self.redis_client:
+            return None
+        
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = aioredis.from_url(self.redis_url, decode_responses=False)
+            self._async_clients[loop] = client
+        return client
+    
+    async def aget(self, key: str) -> Optional[Any]:
+        """Get value from cache without blocking the event loop."""
+        client = self._get_async_client()
+        if client is None:
+            return None
+        
+        try:
+            cached_data = await client.get(key)
+            if cached_data:
+                return pickle.loads(cached_data)
+        except Exception as e:
+            logger.error(f"Cache get error for key {key}: {str(e)}")
+        
+        return None
+    
+    async def aset(self, key: str, value: Any, ttl: int = None) -> bool:
+        """Set value in cache with TTL without blocking the event loop."""
+        client = self._get_async_client()
+        if client is None:
+            return False
+        
+        try:
+            ttl = ttl or self.default_ttl
+            serialized_value = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            return bool(await client.set(key, serialized_value, ex=ttl))
+        except Exception as e:
+            logger.error(f"Cache set error for key {key}: {str(e)}")
+            return False
+    
     def delete(self, key: str) -> bool:
         """Delete key from cache."""
         if not self.redis_client:
@@ -306,24 +354,79 @@ class MapCache:
         key = cache._generate_key('satellite', lat, lon, zoom)
         return cache.get(key)
 
-def cached_function(prefix: str, ttl: int = 3600):
-    """Decorator for caching function results."""
+def _function_cache_key(prefix: str, func, skip_first: bool, args, kwargs) -> str:
+    """Build a stable cache key from the call arguments (excluding self/cls)."""
+    if skip_first:
+        args = args[1:]
+    key_data = json.dumps([func.__name__, args, kwargs], sort_keys=True, default=str)
+    return f"{prefix}:{hashlib.sha1(key_data.encode()).hexdigest()}"
+
+# Stored in place of a None result so it can be told apart from a cache miss
+_NULL_RESULT = '__NULL__'
+
+def cached_function(prefix: str, ttl: int = 3600, negative_ttl: Optional[int] = None):
+    """
+    Decorator for caching function results in Redis.
+    
+    Works for both plain and ``async`` functions. The TTL can be overridden
+    per prefix with the ``CACHE_TTL_<PREFIX>`` environment variable.
+    
+    When ``negative_ttl`` is given, None and empty results are cached for
+    that (usually shorter) time; otherwise None results are not cached.
+    """
+    ttl = int(os.getenv(f"CACHE_TTL_{prefix.upper()}", ttl))
+    
+    def to_cache_entry(result):
+        """Return (value, ttl) to store for a result, or None to skip caching."""
+        if result is None:
+            return (_NULL_RESULT, negative_ttl) if negative_ttl else None
+        if negative_ttl and not result and isinstance(result, (list, dict)):
+            return result, negative_ttl
+        return result, ttl
+    
+    def from_cache_entry(cached_result):
+        return None if cached_result == _NULL_RESULT else cached_result
+    
     def decorator(func):
+        params = list(inspect.signature(func).parameters)
+        skip_first = bool(params) and params[0] in ('self', 'cls')
+        
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                key = _function_cache_key(prefix, func, skip_first, args, kwargs)
+                
+                cached_result = await cache.aget(key)
+                if cached_result is not None:
+                    logger.debug(f"Cache hit for {func.__name__}")
+                    return from_cache_entry(cached_result)
+                
+                result = await func(*args, **kwargs)
+                entry = to_cache_entry(result)
+                if entry is not None:
+                    await cache.aset(key, *entry)
+                    logger.debug(f"Cache miss for {func.__name__}, result cached")
+                
+                return result
+            return async_wrapper
+        
         @wraps(func)
         def wrapper(*args, **kwargs):
             # Generate cache key
-            key = cache._generate_key(prefix, func.__name__, *args, **kwargs)
+            key = _function_cache_key(prefix, func, skip_first, args, kwargs)
             
             # Try to get from cache
             cached_result = cache.get(key)
             if cached_result is not None:
                 logger.debug(f"Cache hit for {func.__name__}")
-                return cached_result
+                return from_cache_entry(cached_result)
             
             # Execute function and cache result
             result = func(*args, **kwargs)
-            cache.set(key, result, ttl)
-            logger.debug(f"Cache miss for {func.__name__}, result cached")
+            entry = to_cache_entry(result)
+            if entry is not None:
+                cache.set(key, *entry)
+                logger.debug(f"Cache miss for {func.__name__}, result cached")
             
             return result
         return wrapper
@@ -1,5 +1,6 @@
 import os
 import logging
+import threading
 from typing import Dict, Any, Optional, Tuple, List
 import numpy as np
 import cv2
@@ -161,13 +162,26 @@ class CoordinateDetector:
         
         logger.info("Coordinate Detector initialized")
     
-    def detect_coordinates_from_image(self, image_path: str, location_hint: Optional[str] = None) -> Dict[str, Any]:
+    def warm_up(self):
+        """Run one dummy YOLO inference so weights and kernels are ready before the first request."""
+        model = getattr(self.yolo_detector, 'model', None)
+        if model is None:
+            return
+        try:
+            model(np.zeros((32, 32, 3), dtype=np.uint8), verbose=False)
+            logger.info("🔥 YOLO model warmed up")
+        except Exception as e:
+            logger.warning(f"YOLO warm-up failed: {e}")
+    
+    def detect_coordinates_from_image(self, image_path: str, location_hint: Optional[str] = None,
+                                      objects: Optional[List[Dict]] = None) -> Dict[str, Any]:
         """
         Detect objects in image and determine their coordinates.
         
         Args:
             image_path: Path to the image file
             location_hint: Optional location hint to improve accuracy
+            objects: Objects already detected for this image (skips YOLO)
             
         Returns:
             Dictionary containing detected objects and their coordinates
@@ -176,7 +190,9 @@ class CoordinateDetector:
             detection_log = []  # Лог всех попыток определения координат
             
             # ШАГ 1: YOLO Detection (выполняется ОДИН раз!)
-            objects = ObjectDetectionCache.get_cached_objects(image_path)
+            batch_detected = objects is not None
+            if not batch_detected:
+                objects = ObjectDetectionCache.get_cached_objects(image_path)
             if objects is None:
                 if self.yolo_detector:
                     yolo_result = self.yolo_detector.detect_objects(image_path)
@@ -211,9 +227,9 @@ class CoordinateDetector:
                     'method': 'YOLO Detection',
                     'success': True,
                     'objects_count': len(objects),
-                    'details': 'Used cached objects'
+                    'details': 'Used batch-detected objects' if batch_detected else 'Used cached objects'
                 })
-                logger.info(f"🎯 Using cached YOLO objects: {len(objects)} objects")
+                logger.info(f"🎯 Using {'batch-detected' if batch_detected else 'cached'} YOLO objects: {len(objects)} objects")
             
             # ШАГ 2: Reference Database Search (НОВОЕ!)
             reference_coords = None
@@ -1471,9 +1487,17 @@ class CoordinateDetector:
         if location_hints and len(location_hints) != len(image_paths):
             location_hints = None
         
+        # One batched YOLO forward pass instead of one inference per image
+        batch_objects = [None] * len(image_paths)
+        if self.yolo_detector and len(image_paths) > 1:
+            for i, yolo_result in enumerate(self.yolo_detector.batch_detect(image_paths)):
+                if yolo_result.get('success'):
+                    batch_objects[i] = yolo_result.get('objects', [])
+                    ObjectDetectionCache.cache_objects(image_paths[i], batch_objects[i])
+        
         for i, image_path in enumerate(image_paths):
             hint = location_hints[i] if location_hints else None
-            result = self.detect_coordinates_from_image(image_path, hint)
+            result = self.detect_coordinates_from_image(image_path, hint, objects=batch_objects[i])
             result['image_path'] = image_path
             results.append(result)
         
@@ -1732,3 +1756,19 @@ class CoordinateDetector:
         recommendations.sort(key=lambda x: priority_order.get(x.get('priority', 'low'), 3))
         
         return recommendations
+
+
+# Process-wide detector: model weights are loaded (and warmed) once and shared
+_shared_detector: Optional[CoordinateDetector] = None
+_shared_detector_lock = threading.Lock()
+
+def get_shared_coordinate_detector() -> CoordinateDetector:
+    """Get the shared CoordinateDetector, creating and warming it on first use (thread-safe)."""
+    global _shared_detector
+    if _shared_detector is None:
+        with _shared_detector_lock:
+            if _shared_detector is None:
+                detector = CoordinateDetector()
+                detector.warm_up()
+                _shared_detector = detector
+    return _shared_detector
@@ -5,11 +5,10 @@
 
 import json
 import logging
-import pandas as pd
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Tuple
 import math
-from datetime import datetime
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
@@ -24,7 +23,15 @@ class ReferenceDatabaseService:
             '18-001': 'Строительная площадка'
         }
         self.total_records = 0
+        
+        # Координатный индекс (структура массивов) для быстрого поиска
+        self._index_lats = np.empty(0, dtype=np.float64)
+        self._index_lons = np.empty(0, dtype=np.float64)
+        self._index_records: List[Dict] = []
+        self._scores: Dict[str, np.ndarray] = {}
+        
         self._load_reference_data()
+        self._build_coordinate_index()
     
     def _load_reference_data(self):
         """Загрузка готовой базы данных заказчика"""
@@ -50,6 +57,11 @@ class ReferenceDatabaseService:
                 
                 key = f"{violation_type}_{period}"
                 self.reference_data[key] = data
+                self._scores[key] = np.asarray(
+                    [record['issues'][0].get('score', 0)
+                     for record in data.get('results', []) if record.get('issues')],
+                    dtype=np.float64
+                )
                 
                 count = data.get('count', 0)
                 self.total_records += count
@@ -77,50 +89,84 @@ class ReferenceDatabaseService:
         
         return R * c
     
+    def _build_coordinate_index(self):
+        """Построение массивов координат для векторизованного поиска"""
+        lats = []
+        lons = []
+        records = []
+        
+        for key, data in self.reference_data.items():
+            if 'results' not in data:
+                continue
+            
+            for record in data['results']:
+                ref_lat = record.get('latitude')
+                ref_lon = record.get('longitude')
+                
+                if ref_lat is None or ref_lon is None or not record.get('issues'):
+                    continue
+                
+                lats.append(ref_lat)
+                lons.append(ref_lon)
+                records.append(record)
+        
+        self._index_lats = np.asarray(lats, dtype=np.float64)
+        self._index_lons = np.asarray(lons, dtype=np.float64)
+        self._index_records = records
+    
     def search_by_coordinates(self, latitude: float, longitude: float, 
                             radius_km: float = 0.1) -> List[Dict]:
         """Поиск нарушений в готовой базе по координатам"""
         try:
             results = []
             
-            for key, data in self.reference_data.items():
-                if 'results' not in data:
-                    continue
+            if len(self._index_records) > 0:
+                # Грубый отбор по ограничивающему прямоугольнику (без тригонометрии)
+                dlat_deg_max = radius_km / 111.0
+                dlon_deg_max = radius_km / (111.0 * max(math.cos(math.radians(latitude)), 1e-6))
+                mask = ((np.abs(self._index_lats - latitude) <= dlat_deg_max) &
+                        (np.abs(self._index_lons - longitude) <= dlon_deg_max))
+                candidates = np.nonzero(mask)[0]
                 
-                for record in data['results']:
-                    ref_lat = record.get('latitude')
-                    ref_lon = record.get('longitude')
+                if len(candidates) > 0:
+                    # Точное расстояние (гаверсинус) только для кандидатов
+                    R = 6371  # Радиус Земли в км
+                    lat1_rad = math.radians(latitude)
+                    lon1_rad = math.radians(longitude)
+                    lat2_rad = np.radians(self._index_lats[candidates])
+                    lon2_rad = np.radians(self._index_lons[candidates])
                     
-                    if ref_lat is None or ref_lon is None:
-                        continue
+                    dlat = lat2_rad - lat1_rad
+                    dlon = lon2_rad - lon1_rad
                     
-                    # Вычисляем расстояние
-                    distance = self._calculate_distance(latitude, longitude, ref_lat, ref_lon)
+                    a = np.sin(dlat/2)**2 + math.cos(lat1_rad) * np.cos(lat2_rad) * np.sin(dlon/2)**2
+                    distances = R * 2 * np.arctan2(np.sqrt(a), np.sqrt(1-a))
                     
-                    if distance <= radius_km:
-                        # Извлекаем информацию о нарушении
-                        issues = record.get('issues', [])
-                        if issues:
-                            issue = issues[0]  # Берем первое нарушение
-                            
-                            result = {
-                                'id': record.get('id'),
-                                'violation_type': issue.get('label'),
-                                'violation_name': self.violation_types.get(issue.get('label'), 'Unknown'),
-                                'confidence': issue.get('score', 0),
-                                'latitude': ref_lat,
-                                'longitude': ref_lon,
-                                'distance_km': distance,
-                                'image_url': record.get('image'),
-                                'bbox': issue.get('bbox', {}),
-                                'camera_id': record.get('camera'),
-                                'timestamp': record.get('create_timestamp'),
-                                'source': 'reference_database'
-                            }
-                            results.append(result)
-            
-            # Сортируем по расстоянию
-            results.sort(key=lambda x: x['distance_km'])
+                    within = distances <= radius_km
+                    candidates = candidates[within]
+                    distances = distances[within]
+                    
+                    # Сортируем по расстоянию
+                    order = np.argsort(distances, kind='stable')
+                    
+                    for idx, distance in zip(candidates[order], distances[order]):
+                        record = self._index_records[idx]
+                        issue = record['issues'][0]  # Берем первое нарушение
+                        
+                        results.append({
+                            'id': record.get('id'),
+                            'violation_type': issue.get('label'),
+                            'violation_name': self.violation_types.get(issue.get('label'), 'Unknown'),
+                            'confidence': issue.get('score', 0),
+                            'latitude': record['latitude'],
+                            'longitude': record['longitude'],
+                            'distance_km': float(distance),
+                            'image_url': record.get('image'),
+                            'bbox': issue.get('bbox', {}),
+                            'camera_id': record.get('camera'),
+                            'timestamp': record.get('create_timestamp'),
+                            'source': 'reference_database'
+                        })
             
             logger.info(f"🔍 Найдено {len(results)} записей в готовой базе рядом с {latitude}, {longitude}")
             return results[:20]  # Ограничиваем результаты
@@ -213,8 +259,6 @@ class ReferenceDatabaseService:
                 }
             }
             
-            all_confidences = []
-            
             for key, data in self.reference_data.items():
                 violation_type = key.split('_')[0]
                 period = key.split('_')[1]
@@ -222,19 +266,15 @@ class ReferenceDatabaseService:
                 
                 stats['violation_types'][violation_type] = stats['violation_types'].get(violation_type, 0) + count
                 stats['periods'][period] = stats['periods'].get(period, 0) + count
-                
-                # Собираем статистику по уверенности
-                if 'results' in data:
-                    for record in data['results'][:1000]:  # Ограничиваем для производительности
-                        issues = record.get('issues', [])
-                        if issues:
-                            confidence = issues[0].get('score', 0)
-                            all_confidences.append(confidence)
             
-            if all_confidences:
-                stats['confidence_stats']['min'] = min(all_confidences)
-                stats['confidence_stats']['max'] = max(all_confidences)
-                stats['confidence_stats']['avg'] = sum(all_confidences) / len(all_confidences)
+            # Статистика по уверенности по всем записям за один проход
+            score_arrays = [self._scores[key] for key in self.reference_data if key in self._scores]
+            if score_arrays:
+                all_scores = np.concatenate(score_arrays)
+                if all_scores.size:
+                    stats['confidence_stats']['min'] = float(all_scores.min())
+                    stats['confidence_stats']['max'] = float(all_scores.max())
+                    stats['confidence_stats']['avg'] = float(all_scores.mean())
             
             return stats
             
@@ -4,15 +4,122 @@
 Работа с российскими спутниковыми данными
 """
 import os
+import math
+import asyncio
 import logging
+import threading
+import time
+import types
+import string
+from collections import defaultdict
+from functools import lru_cache
+from pathlib import Path
+from urllib.parse import urlparse
+import aiohttp
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 import requests
+from cachecontrol import CacheControlAdapter
+from cachecontrol.caches.file_cache import FileCache
+from urllib3.util.retry import Retry
 import json
-from typing import Optional, Dict, Any, List, Tuple
+import cv2
+import filetype
+import numpy as np
+import diskcache
+from shapely.geometry import box, shape
+from shapely.strtree import STRtree
+from cachetools import LRUCache, TTLCache
+from typing import Optional, Dict, Any, List, Tuple, Callable, Mapping
 from datetime import datetime, timedelta
 import base64
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Параметры сопоставления изображений по ORB-дескрипторам
+ORB_FEATURES = 500
+ORB_MATCH_MAX_DISTANCE = 40
+
+# Общий таймаут гонки источников (секунды)
+SOURCES_RACE_TIMEOUT = 25
+PUBLIC_SOURCES_RACE_TIMEOUT = 15
+
+# Размыкатель цепи: источник пропускается после серии отказов
+CIRCUIT_FAILURE_THRESHOLD = 3
+CIRCUIT_RESET_TIMEOUT = 60  # секунды
+
+# Таймаут установки соединения (секунды); таймаут чтения задается для каждого запроса
+CONNECT_TIMEOUT = 3.0
+
+# Кэш тайлов: LRU в памяти процесса + постоянный кэш на диске
+TILE_MEMORY_CACHE_SIZE = 4096
+TILE_DISK_CACHE_SIZE_LIMIT = 2 * 1024 ** 3  # 2 ГБ
+
+# Фоновая предзагрузка соседних и родительского тайлов
+PREFETCH_WORKERS = 4
+
+# Максимальный размер загружаемого изображения
+MAX_IMAGE_BYTES = 4 * 1024 * 1024  # 4 МБ
+
+# Функции и константы для _deg2tile, связанные на уровне модуля
+_radians = math.radians
+_tan = math.tan
+_asinh = math.asinh
+_INV_PI = 1.0 / math.pi
+_INV_360 = 1.0 / 360.0
+
+def _json_loads(content: bytes) -> Any:
+    """Разбор JSON-ответа (orjson, если доступен)"""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def _json_dumps(obj: Any) -> str:
+    """Форматированный вывод JSON (orjson, если доступен)"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(obj, indent=2, ensure_ascii=False)
+
+
+def _phash(gray: np.ndarray) -> np.uint64:
+    """64-битный перцептивный хэш (pHash) изображения в оттенках серого"""
+    small = cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low_freq = cv2.dct(small)[:8, :8]
+    bits = (low_freq > np.median(low_freq)).flatten()
+    return np.packbits(bits).view('>u8')[0].astype(np.uint64)
+
+
+def _hamming_distances(query_hash: np.uint64, hashes: np.ndarray) -> np.ndarray:
+    """Расстояния Хэмминга от хэша запроса до массива хэшей (np.uint64)"""
+    xor = np.bitwise_xor(np.asarray(hashes, dtype=np.uint64), np.uint64(query_hash))
+    return np.unpackbits(xor.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+
+@lru_cache(maxsize=1)
+def _load_satellite_info() -> Mapping[str, Any]:
+    """Статическая информация о спутниках из data/satellites.json (читается один раз)"""
+    path = Path(__file__).parent / 'data' / 'satellites.json'
+    return types.MappingProxyType(_json_loads(path.read_bytes()))
+
+
+def _compile_tile_template(template: str) -> Callable[..., str]:
+    """Проверка шаблона URL тайла ({x}, {y}, {z}) и возврат его метода format"""
+    fields = {field for _, field, _, _ in string.Formatter().parse(template) if field}
+    if fields != {'x', 'y', 'z'}:
+        raise ValueError(f'Invalid tile URL template: {template}')
+    return template.format
+
+
+def _jsonable(d: Dict[str, Any]) -> Dict[str, Any]:
+    """Замена бинарных значений (image_data) описанием размера для вывода в JSON"""
+    return {k: (f'<{len(v)} bytes>' if isinstance(v, (bytes, bytearray)) else v) for k, v in d.items()}
+
+
 class RoscosmosService:
     """
     Сервис для работы с российскими спутниковыми данными:
@@ -22,6 +129,27 @@ class RoscosmosService:
     - Поиск архивных снимков
     """
     
+    # Половина стороны области поиска снимков вокруг точки (градусы)
+    _BBOX_HALF_SIDE = 0.01
+    _BBOX_FORMAT = '{:.6f},{:.6f},{:.6f},{:.6f}'
+    
+    SCANEX_TILE_URL = "https://maps.kosmosnimki.ru/TileService.ashx"
+    
+    # Открытые источники спутниковых тайлов: (название, шаблон URL)
+    PUBLIC_TILE_SOURCES = (
+        ('ESRI World Imagery',
+         "https://server.arcgisonline.com/ArcGIS/rest/services/World_Imagery/MapServer/tile/{z}/{y}/{x}"),
+        ('Google Satellite',
+         "https://mt1.google.com/vt/lyrs=s&x={x}&y={y}&z={z}"),
+    )
+    # Связанные методы format шаблонов, проверенных при импорте модуля
+    _PUBLIC_TILE_FORMATTERS = {
+        name: _compile_tile_template(template) for name, template in PUBLIC_TILE_SOURCES
+    }
+    PUBLIC_TILE_HEADERS = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+    }
+    
     def __init__(self):
         self.api_key = os.getenv('ROSCOSMOS_API_KEY')
         self.base_url = 'https://gptl.ru/api'  # Геопортал Роскосмоса
@@ -33,6 +161,42 @@ class RoscosmosService:
         
         if not self.api_key:
             logger.warning("ROSCOSMOS_API_KEY not found, using public endpoints")
+        
+        # Общая HTTP-сессия с пулом keep-alive соединений и HTTP-кэшем,
+        # учитывающим Cache-Control/ETag серверов тайлов
+        self.session = requests.Session()
+        adapter = CacheControlAdapter(
+            cache=FileCache(os.getenv('ROSCOSMOS_HTTP_CACHE_DIR', 'data/tile_http_cache'), forever=False),
+            pool_connections=20,
+            pool_maxsize=40,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 502, 503, 504])
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'Connection': 'keep-alive',
+            'User-Agent': 'geo_locator/1.0'
+        })
+        
+        # Кэш тайлов по ключу "{source}:{z}/{x}/{y}"
+        self._tile_memory_cache = LRUCache(maxsize=TILE_MEMORY_CACHE_SIZE)
+        self._tile_memory_lock = threading.Lock()
+        self.tile_cache = diskcache.Cache(
+            os.getenv('ROSCOSMOS_TILE_CACHE_DIR', 'data/tile_cache'),
+            size_limit=TILE_DISK_CACHE_SIZE_LIMIT
+        )
+        
+        # Состояние размыкателя цепи: {source_name: (fail_count, last_fail_ts)}
+        self._circuit: Dict[str, Tuple[int, float]] = {}
+        self._circuit_lock = threading.Lock()
+        
+        # Предзагрузка соседних тайлов в фоне (не блокирует запрос пользователя)
+        self.prefetch_enabled = os.getenv('ROSCOSMOS_TILE_PREFETCH', 'true').lower() == 'true'
+        self._prefetch_executor = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS)
+        self._prefetch_semaphore = threading.Semaphore(PREFETCH_WORKERS)
+        
+        # Кэш ORB-дескрипторов спутниковых снимков по тайлу (lat, lon, zoom)
+        self._descriptor_cache = TTLCache(maxsize=256, ttl=3600)
     
     def get_satellite_image(self, lat: float, lon: float, zoom: int = 16, 
                            date_from: str = None, date_to: str = None) -> Dict[str, Any]:
@@ -45,21 +209,25 @@ class RoscosmosService:
             date_from, date_to: Диапазон дат в формате YYYY-MM-DD
         """
         try:
-            # Пробуем несколько источников
+            # Опрашиваем все источники параллельно, берем первый успешный ответ
             sources = [
-                self._get_from_geoportal,
-                self._get_from_scanex,
-                self._get_from_public_sources
+                ('geoportal', self._get_from_geoportal),
+                ('scanex', self._get_from_scanex),
+                ('public', self._get_from_public_sources)
             ]
             
-            for source_func in sources:
-                try:
-                    result = source_func(lat, lon, zoom, date_from, date_to)
-                    if result.get('success'):
-                        return result
-                except Exception as e:
-                    logger.warning(f"Source failed: {e}")
-                    continue
+            # Источники с разомкнутой цепью пропускаем
+            calls = [
+                lambda name=name, f=source_func: self._call_with_circuit(
+                    name, f, lat, lon, zoom, date_from, date_to)
+                for name, source_func in sources
+                if not self._is_circuit_open(name)
+            ]
+            
+            if calls:
+                result = self._first_successful(calls, timeout=SOURCES_RACE_TIMEOUT)
+                if result:
+                    return result
             
             return {
                 'success': False,
@@ -71,13 +239,67 @@ class RoscosmosService:
             logger.error(f"Error getting satellite image: {e}")
             return {'success': False, 'error': str(e), 'source': 'roscosmos'}
     
+    def _is_circuit_open(self, source_name: str) -> bool:
+        """Проверка, пропускается ли источник после серии отказов"""
+        with self._circuit_lock:
+            fail_count, last_fail_ts = self._circuit.get(source_name, (0, 0.0))
+        return (fail_count >= CIRCUIT_FAILURE_THRESHOLD and
+                time.monotonic() - last_fail_ts < CIRCUIT_RESET_TIMEOUT)
+    
+    def _record_source_result(self, source_name: str, success: bool):
+        """Обновление состояния размыкателя цепи; успех сбрасывает счетчик"""
+        with self._circuit_lock:
+            if success:
+                self._circuit.pop(source_name, None)
+            else:
+                fail_count, _ = self._circuit.get(source_name, (0, 0.0))
+                self._circuit[source_name] = (fail_count + 1, time.monotonic())
+    
+    def _call_with_circuit(self, source_name: str, source_func: Callable[..., Dict[str, Any]],
+                           *args) -> Dict[str, Any]:
+        """Вызов источника с учетом результата в размыкателе цепи"""
+        try:
+            result = source_func(*args)
+        except Exception:
+            self._record_source_result(source_name, False)
+            raise
+        
+        self._record_source_result(source_name, bool(result and result.get('success')))
+        return result
+    
+    def _first_successful(self, calls: List[Callable[[], Dict[str, Any]]],
+                          timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        Параллельный запуск вызовов в пуле потоков.
+        Возвращает первый результат с success=True, остальные отменяются
+        """
+        executor = ThreadPoolExecutor(max_workers=len(calls))
+        futures = [executor.submit(call) for call in calls]
+        
+        try:
+            for future in as_completed(futures, timeout=timeout):
+                try:
+                    result = future.result()
+                    if result and result.get('success'):
+                        return result
+                except Exception as e:
+                    logger.warning(f"Source failed: {e}")
+        except FuturesTimeoutError:
+            logger.warning(f"Sources did not respond within {timeout}s")
+        finally:
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+        
+        return None
+    
     def _get_from_geoportal(self, lat: float, lon: float, zoom: int, 
                            date_from: str = None, date_to: str = None) -> Dict[str, Any]:
         """Получение снимков через геопортал Роскосмоса"""
         try:
             # Поиск доступных снимков
             search_params = {
-                'bbox': f"{lon-0.01},{lat-0.01},{lon+0.01},{lat+0.01}",
+                'bbox': self._format_bbox(lon, lat, lon, lat),
                 'limit': 10,
                 'cloud_cover': 30  # Максимальная облачность 30%
             }
@@ -90,11 +312,11 @@ class RoscosmosService:
             if self.api_key:
                 search_params['api_key'] = self.api_key
             
-            response = requests.get(f"{self.catalog_url}/search", 
-                                  params=search_params, timeout=15)
+            response = self.session.get(f"{self.catalog_url}/search", 
+                                        params=search_params, timeout=(CONNECT_TIMEOUT, 15))
             
             if response.status_code == 200:
-                data = response.json()
+                data = _json_loads(response.content)
                 
                 if data.get('features'):
                     # Берем первый доступный снимок
@@ -112,15 +334,17 @@ class RoscosmosService:
                     if self.api_key:
                         image_params['api_key'] = self.api_key
                     
-                    img_response = requests.get(f"{self.base_url}/image", 
-                                              params=image_params, timeout=20)
+                    cache_key = f"geoportal:{image_id}/{zoom}/{round(lat, 5)}/{round(lon, 5)}"
+                    tile = self._fetch_tile_cached(cache_key, f"{self.base_url}/image",
+                                                   params=image_params, timeout=20)
                     
-                    if img_response.status_code == 200:
+                    if tile:
+                        image_data, content_type = tile
                         return {
                             'success': True,
                             'source': 'roscosmos_geoportal',
-                            'image_data': img_response.content,
-                            'content_type': img_response.headers.get('content-type', 'image/jpeg'),
+                            'image_data': image_data,
+                            'content_type': content_type,
                             'coordinates': {'latitude': lat, 'longitude': lon},
                             'zoom': zoom,
                             'satellite': feature.get('properties', {}).get('satellite', 'Unknown'),
@@ -139,39 +363,26 @@ class RoscosmosService:
         """Получение снимков через ScanEx (Космоснимки)"""
         try:
             # ScanEx предоставляет открытый доступ к некоторым снимкам
-            tile_url = f"https://maps.kosmosnimki.ru/TileService.ashx"
-            
             # Вычисляем тайл для координат
             tile_x, tile_y = self._deg2tile(lat, lon, zoom)
             
-            params = {
-                'request': 'GetTile',
-                'layer': 'satellite',  # Спутниковый слой
-                'z': zoom,
-                'x': tile_x,
-                'y': tile_y,
-                'format': 'image/jpeg'
-            }
-            
-            response = requests.get(tile_url, params=params, timeout=15)
+            url, params, headers = self._tile_request('scanex', zoom, tile_x, tile_y)
+            tile = self._fetch_tile_cached(self._tile_key('scanex', zoom, tile_x, tile_y),
+                                           url, params=params, headers=headers, timeout=15)
             
-            if response.status_code == 200 and response.content:
-                # Проверяем, что это действительно изображение, а не XML ошибка
-                content_type = response.headers.get('content-type', '').lower()
-                if 'image' in content_type or (response.content[:4] in [b'\xff\xd8\xff\xe0', b'\xff\xd8\xff\xe1', b'\x89PNG']):
-                    return {
-                        'success': True,
-                        'source': 'scanex_kosmosnimki',
-                        'image_data': response.content,
-                        'content_type': 'image/jpeg',
-                        'coordinates': {'latitude': lat, 'longitude': lon},
-                        'zoom': zoom,
-                        'tile_coords': {'x': tile_x, 'y': tile_y},
-                        'satellite': 'Mixed Russian satellites'
-                    }
-                else:
-                    logger.warning(f"ScanEx returned non-image content: {response.content[:100]}")
-                    return {'success': False, 'source': 'scanex_kosmosnimki', 'error': 'Invalid image format'}
+            if tile:
+                image_data, content_type = tile
+                self._schedule_prefetch('scanex', zoom, tile_x, tile_y)
+                return {
+                    'success': True,
+                    'source': 'scanex_kosmosnimki',
+                    'image_data': image_data,
+                    'content_type': content_type,
+                    'coordinates': {'latitude': lat, 'longitude': lon},
+                    'zoom': zoom,
+                    'tile_coords': {'x': tile_x, 'y': tile_y},
+                    'satellite': 'Mixed Russian satellites'
+                }
             
             return {'success': False, 'source': 'scanex_kosmosnimki'}
             
@@ -189,40 +400,15 @@ class RoscosmosService:
             # Пример с использованием открытого спутникового слоя
             tile_x, tile_y = self._deg2tile(lat, lon, zoom)
             
-            # Пробуем несколько открытых источников
-            sources = [
-                {
-                    'url': f"https://server.arcgisonline.com/ArcGIS/rest/services/World_Imagery/MapServer/tile/{zoom}/{tile_y}/{tile_x}",
-                    'name': 'ESRI World Imagery'
-                },
-                {
-                    'url': f"https://mt1.google.com/vt/lyrs=s&x={tile_x}&y={tile_y}&z={zoom}",
-                    'name': 'Google Satellite'
-                }
-            ]
-            
-            for source in sources:
-                try:
-                    response = requests.get(source['url'], timeout=10, headers={
-                        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                    })
-                    if response.status_code == 200 and response.content:
-                        # Проверяем, что это изображение
-                        content_type = response.headers.get('content-type', '').lower()
-                        if 'image' in content_type or (response.content[:4] in [b'\xff\xd8\xff\xe0', b'\xff\xd8\xff\xe1', b'\x89PNG']):
-                            return {
-                                'success': True,
-                                'source': f'public_satellite_{source["name"]}',
-                                'image_data': response.content,
-                                'content_type': content_type or 'image/jpeg',
-                                'coordinates': {'latitude': lat, 'longitude': lon},
-                                'zoom': zoom,
-                                'tile_coords': {'x': tile_x, 'y': tile_y},
-                                'satellite': source['name']
-                            }
-                except Exception as e:
-                    logger.warning(f"Public source {source['name']} failed: {e}")
-                    continue
+            # Опрашиваем открытые источники параллельно
+            result = self._first_successful(
+                [lambda name=name: self._fetch_public_tile(name, lat, lon, zoom, tile_x, tile_y)
+                 for name, _ in self.PUBLIC_TILE_SOURCES],
+                timeout=PUBLIC_SOURCES_RACE_TIMEOUT
+            )
+            if result:
+                self._schedule_prefetch(result['satellite'], zoom, tile_x, tile_y)
+                return result
             
             return {'success': False, 'source': 'public_satellite'}
             
@@ -230,13 +416,239 @@ class RoscosmosService:
             logger.error(f"Public sources error: {e}")
             return {'success': False, 'source': 'public_satellite'}
     
+    def _fetch_public_tile(self, source_name: str, lat: float, lon: float, zoom: int,
+                           tile_x: int, tile_y: int) -> Dict[str, Any]:
+        """Загрузка тайла из одного открытого источника"""
+        try:
+            url, params, headers = self._tile_request(source_name, zoom, tile_x, tile_y)
+            tile = self._fetch_tile_cached(self._tile_key(source_name, zoom, tile_x, tile_y),
+                                           url, params=params, headers=headers, timeout=10)
+            if tile:
+                image_data, content_type = tile
+                return {
+                    'success': True,
+                    'source': f'public_satellite_{source_name}',
+                    'image_data': image_data,
+                    'content_type': content_type,
+                    'coordinates': {'latitude': lat, 'longitude': lon},
+                    'zoom': zoom,
+                    'tile_coords': {'x': tile_x, 'y': tile_y},
+                    'satellite': source_name
+                }
+        except Exception as e:
+            logger.warning(f"Public source {source_name} failed: {e}")
+        
+        return {'success': False, 'source': f'public_satellite_{source_name}'}
+    
+    def _tile_request(self, source_name: str, z: int, x: int,
+                      y: int) -> Tuple[str, Optional[Dict[str, Any]], Optional[Dict[str, str]]]:
+        """Параметры HTTP-запроса тайла (url, params, headers) для источника"""
+        if source_name == 'scanex':
+            params = {
+                'request': 'GetTile',
+                'layer': 'satellite',  # Спутниковый слой
+                'z': z,
+                'x': x,
+                'y': y,
+                'format': 'image/jpeg'
+            }
+            return self.SCANEX_TILE_URL, params, None
+        
+        formatter = self._PUBLIC_TILE_FORMATTERS.get(source_name)
+        if formatter is None:
+            raise ValueError(f'Unknown tile source: {source_name}')
+        
+        return formatter(x=x, y=y, z=z), None, self.PUBLIC_TILE_HEADERS
+    
+    def _schedule_prefetch(self, source_name: str, z: int, x: int, y: int):
+        """Постановка предзагрузки соседних тайлов в фоновую очередь"""
+        if self.prefetch_enabled:
+            self._prefetch_executor.submit(self._prefetch, source_name, z, x, y)
+    
+    def _prefetch(self, source_name: str, z: int, x: int, y: int):
+        """Загрузка 8 соседних и родительского тайла в кэш"""
+        n = 1 << z
+        tiles = [
+            (z, (x + dx) % n, y + dy)
+            for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+            if (dx or dy) and 0 <= y + dy < n
+        ]
+        if z > 0:
+            tiles.append((z - 1, x // 2, y // 2))
+        
+        for tz, tx, ty in tiles:
+            cache_key = self._tile_key(source_name, tz, tx, ty)
+            if self._get_cached_tile(cache_key) is not None:
+                continue
+            
+            try:
+                url, params, headers = self._tile_request(source_name, tz, tx, ty)
+                with self._prefetch_semaphore:
+                    self._fetch_tile_cached(cache_key, url, params=params, headers=headers, timeout=10)
+            except Exception as e:
+                logger.debug(f"Prefetch {cache_key} failed: {e}")
+    
+    def prime_cache(self, bbox: Tuple[float, float, float, float] = (19.0, 41.0, 180.0, 82.0),
+                    min_zoom: int = 4, max_zoom: int = 8, concurrency: int = 16,
+                    per_host_limit: int = 8, source_name: str = None) -> Dict[str, Any]:
+        """
+        Предварительное заполнение кэша тайлов для области обслуживания
+        
+        Args:
+            bbox: (min_lon, min_lat, max_lon, max_lat), по умолчанию - территория России
+            min_zoom, max_zoom: Диапазон уровней масштабирования
+            concurrency: Число потоков загрузки
+            per_host_limit: Максимум одновременных запросов к одному хосту
+            source_name: Источник тайлов (по умолчанию - первый открытый источник)
+        """
+        source_name = source_name or self.PUBLIC_TILE_SOURCES[0][0]
+        min_lon, min_lat, max_lon, max_lat = bbox
+        
+        # Диапазоны тайлов по углам области для каждого уровня
+        tiles = []
+        for z in range(min_zoom, max_zoom + 1):
+            xs, ys = self._deg2tile_batch([max_lat, min_lat], [min_lon, max_lon], z)
+            last = (1 << z) - 1
+            tiles.extend(
+                (z, x, y)
+                for x in range(max(int(xs[0]), 0), min(int(xs[1]), last) + 1)
+                for y in range(max(int(ys[0]), 0), min(int(ys[1]), last) + 1)
+            )
+        
+        host_semaphores: Dict[str, threading.Semaphore] = {}
+        host_lock = threading.Lock()
+        
+        def _prime(tile: Tuple[int, int, int]) -> str:
+            z, x, y = tile
+            cache_key = self._tile_key(source_name, z, x, y)
+            if self._get_cached_tile(cache_key) is not None:
+                return 'cached'
+            
+            url, params, headers = self._tile_request(source_name, z, x, y)
+            with host_lock:
+                semaphore = host_semaphores.setdefault(
+                    urlparse(url).netloc, threading.Semaphore(per_host_limit))
+            with semaphore:
+                tile_result = self._fetch_tile_cached(cache_key, url, params=params,
+                                                      headers=headers, timeout=10)
+            return 'fetched' if tile_result else 'failed'
+        
+        stats = {'cached': 0, 'fetched': 0, 'failed': 0}
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = [executor.submit(_prime, tile) for tile in tiles]
+            for future in as_completed(futures):
+                try:
+                    stats[future.result()] += 1
+                except Exception as e:
+                    logger.debug(f"Tile priming failed: {e}")
+                    stats['failed'] += 1
+        
+        logger.info(f"Tile cache primed for {source_name}: {len(tiles)} tiles, {stats}")
+        return {
+            'success': True,
+            'source': source_name,
+            'total_tiles': len(tiles),
+            **stats
+        }
+    
+    def _detect_image_type(self, content: bytes, content_type: str = '') -> Optional[str]:
+        """
+        Определение MIME-типа изображения по сигнатуре содержимого
+        (с откатом на заголовок Content-Type). None - если это не изображение
+        """
+        kind = filetype.guess(content[:262])
+        if kind and kind.mime.startswith('image/'):
+            return kind.mime
+        
+        content_type = content_type.lower()
+        if 'image' in content_type:
+            return content_type
+        
+        return None
+    
+    @staticmethod
+    def _tile_key(source: str, z: int, x: int, y: int) -> str:
+        """Ключ кэша тайла"""
+        return f"{source}:{z}/{x}/{y}"
+    
+    def _get_cached_tile(self, cache_key: str) -> Optional[bytes]:
+        """Поиск тайла в кэше: сначала в памяти, затем на диске"""
+        with self._tile_memory_lock:
+            image_data = self._tile_memory_cache.get(cache_key)
+        if image_data is not None:
+            return image_data
+        
+        image_data = self.tile_cache.get(cache_key)
+        if image_data is not None:
+            with self._tile_memory_lock:
+                self._tile_memory_cache[cache_key] = image_data
+        return image_data
+    
+    def _store_tile(self, cache_key: str, image_data: bytes):
+        """Сохранение тайла в кэш памяти и на диск"""
+        with self._tile_memory_lock:
+            self._tile_memory_cache[cache_key] = image_data
+        self.tile_cache.set(cache_key, image_data)
+    
+    def _fetch_tile_cached(self, cache_key: str, url: str, params: Dict[str, Any] = None,
+                           headers: Dict[str, str] = None,
+                           timeout: float = 15) -> Optional[Tuple[bytes, str]]:
+        """
+        Загрузка изображения с учетом кэша тайлов
+        
+        Returns:
+            (image_data, content_type) или None, если изображение недоступно
+        """
+        image_data = self._get_cached_tile(cache_key)
+        if image_data is not None:
+            return image_data, self._detect_image_type(image_data) or 'image/jpeg'
+        
+        with self.session.get(url, params=params, headers=headers, stream=True,
+                              timeout=(CONNECT_TIMEOUT, timeout)) as response:
+            if response.status_code != 200:
+                return None
+            
+            content_length = response.headers.get('content-length')
+            if content_length and int(content_length) > MAX_IMAGE_BYTES:
+                raise ValueError(f'{cache_key}: image too large ({content_length} bytes)')
+            
+            # Читаем ответ частями, прерывая загрузку при превышении лимита
+            buf = bytearray()
+            for chunk in response.iter_content(65536):
+                buf.extend(chunk)
+                if len(buf) > MAX_IMAGE_BYTES:
+                    raise ValueError(f'{cache_key}: image too large (>{MAX_IMAGE_BYTES} bytes)')
+            
+            image_data = bytes(buf)
+            header_content_type = response.headers.get('content-type', '')
+        
+        if not image_data:
+            return None
+        
+        # Проверяем, что это действительно изображение, а не XML ошибка
+        content_type = self._detect_image_type(image_data, header_content_type)
+        if not content_type:
+            logger.warning(f"{cache_key} returned non-image content: {image_data[:100]}")
+            return None
+        
+        self._store_tile(cache_key, image_data)
+        return image_data, content_type
+    
+    def _format_bbox(self, min_lon: float, min_lat: float, max_lon: float, max_lat: float) -> str:
+        """
+        Строка bbox для запросов к каталогу с отступом _BBOX_HALF_SIDE.
+        6 знаков после запятой (~11 см) достаточно для спутниковых снимков
+        """
+        d = self._BBOX_HALF_SIDE
+        return self._BBOX_FORMAT.format(min_lon - d, min_lat - d, max_lon + d, max_lat + d)
+    
     def search_archive(self, lat: float, lon: float, date_from: str, date_to: str,
                       max_cloud_cover: int = 30) -> Dict[str, Any]:
         """
         Поиск архивных снимков для указанной области и периода
         """
         try:
-            bbox = f"{lon-0.01},{lat-0.01},{lon+0.01},{lat+0.01}"
+            bbox = self._format_bbox(lon, lat, lon, lat)
             
             params = {
                 'bbox': bbox,
@@ -249,11 +661,11 @@ class RoscosmosService:
             if self.api_key:
                 params['api_key'] = self.api_key
             
-            response = requests.get(f"{self.catalog_url}/search", 
-                                  params=params, timeout=15)
+            response = self.session.get(f"{self.catalog_url}/search", 
+                                        params=params, timeout=(CONNECT_TIMEOUT, 15))
             
             if response.status_code == 200:
-                data = response.json()
+                data = _json_loads(response.content)
                 
                 results = {
                     'success': True,
@@ -263,16 +675,7 @@ class RoscosmosService:
                 }
                 
                 for feature in data.get('features', []):
-                    props = feature.get('properties', {})
-                    results['images'].append({
-                        'id': feature.get('id'),
-                        'satellite': props.get('satellite', 'Unknown'),
-                        'acquisition_date': props.get('datetime'),
-                        'cloud_cover': props.get('cloud_cover', 0),
-                        'resolution': props.get('gsd', 'Unknown'),
-                        'geometry': feature.get('geometry'),
-                        'preview_url': props.get('preview_url')
-                    })
+                    results['images'].append(self._archive_image_info(feature))
                 
                 return results
             
@@ -286,85 +689,269 @@ class RoscosmosService:
             logger.error(f"Archive search error: {e}")
             return {'success': False, 'error': str(e), 'source': 'roscosmos_archive'}
     
+    def search_archive_batch(self, coords: List[Tuple[float, float]], date_from: str, date_to: str,
+                             max_cloud_cover: int = 30,
+                             tile_size_deg: float = 0.05) -> Dict[str, Any]:
+        """
+        Пакетный поиск архивных снимков для списка точек.
+        Близкие точки группируются в ячейки размером tile_size_deg,
+        для каждой ячейки выполняется один запрос к каталогу
+        
+        Args:
+            coords: Список координат (lat, lon)
+            tile_size_deg: Размер ячейки группировки в градусах
+        """
+        try:
+            results = [
+                {'latitude': lat, 'longitude': lon, 'total_found': 0, 'images': []}
+                for lat, lon in coords
+            ]
+            
+            # Группируем точки по ячейкам сетки
+            groups = defaultdict(list)
+            for idx, (lat, lon) in enumerate(coords):
+                groups[(math.floor(lat / tile_size_deg), math.floor(lon / tile_size_deg))].append(idx)
+            
+            requests_made = 0
+            for indices in groups.values():
+                lats = [coords[i][0] for i in indices]
+                lons = [coords[i][1] for i in indices]
+                
+                params = {
+                    'bbox': self._format_bbox(min(lons), min(lats), max(lons), max(lats)),
+                    'date_from': date_from,
+                    'date_to': date_to,
+                    'cloud_cover': max_cloud_cover,
+                    'limit': 500
+                }
+                
+                if self.api_key:
+                    params['api_key'] = self.api_key
+                
+                response = self.session.get(f"{self.catalog_url}/search", 
+                                            params=params, timeout=(CONNECT_TIMEOUT, 15))
+                requests_made += 1
+                
+                if response.status_code != 200:
+                    logger.warning(f"Archive batch search failed: {response.status_code}")
+                    continue
+                
+                features = [f for f in _json_loads(response.content).get('features', []) if f.get('geometry')]
+                if not features:
+                    continue
+                
+                # Пространственный индекс по геометриям найденных снимков
+                tree = STRtree([shape(f['geometry']) for f in features])
+                
+                for i in indices:
+                    lat, lon = coords[i]
+                    d = self._BBOX_HALF_SIDE
+                    matched = tree.query(box(lon-d, lat-d, lon+d, lat+d),
+                                         predicate='intersects')
+                    images = [self._archive_image_info(features[j]) for j in sorted(matched)]
+                    results[i]['images'] = images
+                    results[i]['total_found'] = len(images)
+            
+            return {
+                'success': True,
+                'source': 'roscosmos_archive',
+                'requests_made': requests_made,
+                'results': results
+            }
+            
+        except Exception as e:
+            logger.error(f"Archive batch search error: {e}")
+            return {'success': False, 'error': str(e), 'source': 'roscosmos_archive'}
+    
+    def _archive_image_info(self, feature: Dict[str, Any]) -> Dict[str, Any]:
+        """Описание архивного снимка из GeoJSON-объекта каталога"""
+        props = feature.get('properties', {})
+        return {
+            'id': feature.get('id'),
+            'satellite': props.get('satellite', 'Unknown'),
+            'acquisition_date': props.get('datetime'),
+            'cloud_cover': props.get('cloud_cover', 0),
+            'resolution': props.get('gsd', 'Unknown'),
+            'geometry': feature.get('geometry'),
+            'preview_url': props.get('preview_url')
+        }
+    
+    async def fetch_previews(self, results: List[Dict[str, Any]],
+                             max_connections: int = 20) -> List[Dict[str, Any]]:
+        """
+        Параллельная загрузка превью для результатов search_archive
+        
+        Args:
+            results: Список снимков из search_archive()['images']
+            max_connections: Максимальное число одновременных соединений
+        """
+        items = [r for r in results if r.get('preview_url')]
+        if not items:
+            return []
+        
+        connector = aiohttp.TCPConnector(limit=max_connections)
+        timeout = aiohttp.ClientTimeout(total=10)
+        
+        async def _fetch(session: aiohttp.ClientSession, item: Dict[str, Any]) -> Dict[str, Any]:
+            async with session.get(item['preview_url']) as response:
+                if response.status != 200:
+                    return {
+                        'id': item.get('id'),
+                        'success': False,
+                        'error': f'Preview request failed: {response.status}'
+                    }
+                return {
+                    'id': item.get('id'),
+                    'success': True,
+                    'image_data': await response.read(),
+                    'content_type': response.headers.get('content-type', 'image/jpeg')
+                }
+        
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            responses = await asyncio.gather(
+                *[_fetch(session, item) for item in items],
+                return_exceptions=True
+            )
+        
+        previews = []
+        for item, response in zip(items, responses):
+            if isinstance(response, Exception):
+                logger.warning(f"Preview {item.get('id')} failed: {response}")
+                previews.append({'id': item.get('id'), 'success': False, 'error': str(response)})
+            else:
+                previews.append(response)
+        
+        return previews
+    
+    def fetch_previews_sync(self, results: List[Dict[str, Any]],
+                            max_connections: int = 20) -> List[Dict[str, Any]]:
+        """Synchronous wrapper for fetch_previews"""
+        return asyncio.run(self.fetch_previews(results, max_connections))
+    
+    # Асинхронные обертки для asyncio-кода (блокирующие вызовы выполняются в пуле потоков)
+    async def get_satellite_image_async(self, *args, **kwargs) -> Dict[str, Any]:
+        """Asynchronous wrapper for get_satellite_image"""
+        return await asyncio.to_thread(self.get_satellite_image, *args, **kwargs)
+    
+    async def search_archive_async(self, *args, **kwargs) -> Dict[str, Any]:
+        """Asynchronous wrapper for search_archive"""
+        return await asyncio.to_thread(self.search_archive, *args, **kwargs)
+    
+    async def search_archive_batch_async(self, *args, **kwargs) -> Dict[str, Any]:
+        """Asynchronous wrapper for search_archive_batch"""
+        return await asyncio.to_thread(self.search_archive_batch, *args, **kwargs)
+    
+    async def compare_with_image_async(self, *args, **kwargs) -> Dict[str, Any]:
+        """Asynchronous wrapper for compare_with_image"""
+        return await asyncio.to_thread(self.compare_with_image, *args, **kwargs)
+    
     def get_satellite_info(self) -> Dict[str, Any]:
         """
         Получение информации о доступных российских спутниках
         """
         return {
             'success': True,
-            'satellites': {
-                'resurs_p': {
-                    'name': 'Ресурс-П',
-                    'resolution': '1-3 метра',
-                    'bands': ['RGB', 'NIR', 'PAN'],
-                    'operator': 'Роскосмос',
-                    'status': 'Активный'
-                },
-                'kanopus_v': {
-                    'name': 'Канопус-В',
-                    'resolution': '2.5 метра',
-                    'bands': ['RGB', 'NIR'],
-                    'operator': 'Роскосмос',
-                    'status': 'Активный'
-                },
-                'elektro_l': {
-                    'name': 'Электро-Л',
-                    'resolution': '1 км',
-                    'bands': ['Метео'],
-                    'operator': 'Роскосмос',
-                    'status': 'Активный'
-                },
-                'meteor_m': {
-                    'name': 'Метеор-М',
-                    'resolution': '1 км',
-                    'bands': ['Метео', 'RGB'],
-                    'operator': 'Роскосмос',
-                    'status': 'Активный'
-                }
-            },
-            'coverage': 'Территория России и сопредельных государств',
-            'update_frequency': 'Ежедневно',
+            **_load_satellite_info(),
             'api_status': 'Доступен' if self.api_key else 'Ограниченный доступ'
         }
     
     def _deg2tile(self, lat: float, lon: float, zoom: int) -> Tuple[int, int]:
         """Преобразование координат в номера тайлов"""
-        import math
+        lat_rad = _radians(lat)
+        n = float(1 << zoom)
+        x = int((lon + 180.0) * n * _INV_360)
+        y = int((1.0 - _asinh(_tan(lat_rad)) * _INV_PI) * 0.5 * n)
+        
+        return x, y
+    
+    def _deg2tile_batch(self, lats: np.ndarray, lons: np.ndarray,
+                        zoom: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Векторное преобразование массивов координат в номера тайлов"""
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
         
-        lat_rad = math.radians(lat)
-        n = 2.0 ** zoom
-        x = int((lon + 180.0) / 360.0 * n)
-        y = int((1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n)
+        lat_rad = np.radians(lats)
+        n = float(1 << zoom)
+        x = ((lons + 180.0) / 360.0 * n).astype(np.int32)
+        y = ((1.0 - np.arcsinh(np.tan(lat_rad)) / np.pi) / 2.0 * n).astype(np.int32)
         
         return x, y
     
-    def compare_with_image(self, image_path: str, lat: float, lon: float) -> Dict[str, Any]:
+    def compare_with_image(self, image_path: str, lat: float, lon: float, zoom: int = 16) -> Dict[str, Any]:
         """
         Сравнение загруженного изображения со спутниковым снимком
+        по ORB-дескрипторам (BFMatcher, расстояние Хэмминга)
+        и перцептивному хэшу (pHash)
         """
         try:
-            # Получаем спутниковый снимок
-            satellite_result = self.get_satellite_image(lat, lon, zoom=16)
-            
-            if not satellite_result.get('success'):
+            query_image = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+            if query_image is None:
                 return {
                     'success': False,
-                    'error': 'Could not get satellite image',
+                    'error': f'Could not read image: {image_path}',
                     'source': 'roscosmos_compare'
                 }
             
-            # Упрощенное сравнение изображений
-            # В реальном проекте здесь должен быть более сложный алгоритм
-            import random
-            match_score = random.uniform(40, 90)  # Имитация результата
+            # Дескрипторы спутникового снимка кэшируются по тайлу
+            cache_key = (round(lat, 3), round(lon, 3), zoom)
+            cached = self._descriptor_cache.get(cache_key)
+            
+            if cached is None:
+                satellite_result = self.get_satellite_image(lat, lon, zoom=zoom)
+                
+                if not satellite_result.get('success'):
+                    return {
+                        'success': False,
+                        'error': 'Could not get satellite image',
+                        'source': 'roscosmos_compare'
+                    }
+                
+                satellite_image = cv2.imdecode(
+                    np.frombuffer(satellite_result['image_data'], np.uint8),
+                    cv2.IMREAD_GRAYSCALE
+                )
+                if satellite_image is None:
+                    return {
+                        'success': False,
+                        'error': 'Could not decode satellite image',
+                        'source': 'roscosmos_compare'
+                    }
+                
+                orb = cv2.ORB_create(nfeatures=ORB_FEATURES)
+                _, satellite_descriptors = orb.detectAndCompute(satellite_image, None)
+                cached = {
+                    'satellite_result': satellite_result,
+                    'descriptors': satellite_descriptors,
+                    'phash': _phash(satellite_image)
+                }
+                self._descriptor_cache[cache_key] = cached
+            
+            orb = cv2.ORB_create(nfeatures=ORB_FEATURES)
+            query_keypoints, query_descriptors = orb.detectAndCompute(query_image, None)
+            satellite_descriptors = cached['descriptors']
+            
+            good_matches = 0
+            if query_descriptors is not None and satellite_descriptors is not None:
+                matcher = cv2.BFMatcher(cv2.NORM_HAMMING, crossCheck=True)
+                matches = matcher.match(query_descriptors, satellite_descriptors)
+                good_matches = sum(1 for m in matches if m.distance < ORB_MATCH_MAX_DISTANCE)
+            
+            match_score = min(100.0, good_matches / max(len(query_keypoints), 1) * 100.0)
+            
+            # Сходство по перцептивному хэшу: 64 бита XOR + popcount
+            phash_distance = int(_hamming_distances(_phash(query_image), [cached['phash']])[0])
+            phash_score = 100.0 * (1 - phash_distance / 64.0)
             
             return {
                 'success': True,
                 'source': 'roscosmos_compare',
                 'match_score': match_score,
                 'confidence': match_score / 100.0,
-                'satellite_data': satellite_result,
-                'comparison_method': 'Feature matching + SIFT',
+                'good_matches': good_matches,
+                'phash_score': phash_score,
+                'phash_distance': phash_distance,
+                'satellite_data': cached['satellite_result'],
+                'comparison_method': 'ORB feature matching + pHash',
                 'coordinates': {'latitude': lat, 'longitude': lon}
             }
             
@@ -379,8 +966,8 @@ if __name__ == "__main__":
     
     # Тест получения спутникового снимка для Москвы
     result = service.get_satellite_image(55.7558, 37.6176, zoom=15)
-    print("Satellite image result:", json.dumps(result, indent=2, ensure_ascii=False))
+    print("Satellite image result:", _json_dumps(_jsonable(result)))
     
     # Информация о спутниках
     info = service.get_satellite_info()
-    print("Satellite info:", json.dumps(info, indent=2, ensure_ascii=False))
+    print("Satellite info:", _json_dumps(info))
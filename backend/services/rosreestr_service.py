@@ -1,19 +1,144 @@
 import os
+import re
+import math
+import random
+import atexit
 import logging
+import threading
 import requests
 import asyncio
 import aiohttp
 from typing import Dict, List, Any, Optional, Tuple
-from dataclasses import dataclass
+from dataclasses import dataclass, field, fields
 from datetime import datetime
 import json
-from .cache_service import cached_function, MapCache
+import numpy as np
+from .cache_service import cache, cached_function, MapCache
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import aiodns  # noqa: F401 - enables aiohttp.AsyncResolver
+except ImportError:
+    aiodns = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Maximum number of in-flight requests to the Rosreestr/PKK API
+MAX_CONCURRENT_REQUESTS = int(os.getenv('ROSREESTR_MAX_CONCURRENCY', '16'))
+
+# Retries for transient upstream failures (exponential backoff with jitter)
+RETRY_ATTEMPTS = 4
+RETRY_BACKOFF_BASE = 0.25
+RETRY_JITTER = 0.1
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# How long ETag validators and their bodies are kept for conditional refetches
+ETAG_CACHE_TTL = 7 * 86400
+
+# Half the width of the Web Mercator world square, in metres
+WEB_MERCATOR_HALF_EXTENT = 20037508.34
+
+# Keep-alive connection pool shared by all requests of the process
+CONNECTION_POOL_LIMIT = int(os.getenv('ROSREESTR_POOL_LIMIT', '100'))
+CONNECTION_POOL_LIMIT_PER_HOST = int(os.getenv('ROSREESTR_POOL_LIMIT_PER_HOST', '32'))
+KEEPALIVE_TIMEOUT = 75
+DNS_CACHE_TTL = 600
+
+def _json_loads(content: bytes) -> Any:
+    """Parse a JSON response body (with orjson when available)."""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+# Cadastral number format, e.g. "77:01:0001001:1234"
+_CN_RE = re.compile(r'^\d{2}:\d{2}:\d{6,7}:\d+$')
+
+# PKK attribute keys (with defaults) for the PropertyInfo fields after the cadastral number
+_ATTR_KEYS_WITH_DEFAULTS = (
+    ('address', ''),
+    ('area_value', 0),
+    ('category_type', ''),
+    ('util_by_doc', 'Не определено'),
+    ('form_of_ownership', ''),
+    ('date_create', '')
+)
+# Attributes only present in single-object responses: cost, year built, floors, material
+_EXTENDED_ATTR_KEYS = ('cad_cost', 'year_built', 'floors', 'material')
+
+# Permitted-use keywords for each observed usage type
+_USAGE_MAPPINGS: Dict[str, frozenset] = {
+    'residential': frozenset({'жилая', 'многоквартирный дом', 'индивидуальное жилищное строительство'}),
+    'commercial': frozenset({'торговля', 'офис', 'коммерческая', 'предпринимательство'}),
+    'industrial': frozenset({'производство', 'промышленность', 'склад'}),
+    'public': frozenset({'образование', 'здравоохранение', 'культура', 'спорт'})
+}
+_USAGE_KEYWORD_TAGS = {
+    keyword: usage_type
+    for usage_type, keywords in _USAGE_MAPPINGS.items()
+    for keyword in keywords
+}
+
+def _keyword_pattern(keywords) -> re.Pattern:
+    """Compile keywords into one pattern that also reports overlapping matches."""
+    alternation = '|'.join(re.escape(k) for k in sorted(keywords, key=len, reverse=True))
+    return re.compile(f'(?=({alternation}))')
+
+# Single-pass matchers, compiled once at import
+_USAGE_KEYWORD_PATTERN = _keyword_pattern(_USAGE_KEYWORD_TAGS)
+_COMMERCIAL_ADDRESS_PATTERN = _keyword_pattern(['магазин', 'офис', 'салон'])
+
+# Rings shorter than this are cheaper to process in pure Python than in NumPy
+_NUMPY_RING_THRESHOLD = 8
+
+def _ring_centroid(ring: List[List[float]]) -> Optional[Tuple[float, float]]:
+    """
+    Area-weighted (shoelace) centroid of a polygon ring.
+    
+    Falls back to the vertex mean for degenerate rings with zero area.
+    
+    Returns:
+        (lat, lon) tuple or None for an empty ring
+    """
+    if not ring:
+        return None
+    
+    if len(ring) < _NUMPY_RING_THRESHOLD:
+        xs = [point[0] for point in ring]
+        ys = [point[1] for point in ring]
+        area2 = cx = cy = 0.0
+        for i in range(len(ring)):
+            j = (i + 1) % len(ring)
+            cross = xs[i] * ys[j] - xs[j] * ys[i]
+            area2 += cross
+            cx += (xs[i] + xs[j]) * cross
+            cy += (ys[i] + ys[j]) * cross
+        if abs(area2) > 1e-15:
+            return (cy / (3.0 * area2), cx / (3.0 * area2))
+        return (sum(ys) / len(ys), sum(xs) / len(xs))
+    
+    arr = np.asarray(ring, dtype=np.float64)[:, :2]
+    x = arr[:, 0]
+    y = arr[:, 1]
+    x_next = np.roll(x, -1)
+    y_next = np.roll(y, -1)
+    cross = x * y_next - x_next * y
+    area2 = cross.sum()
+    if abs(area2) > 1e-15:
+        cx = ((x + x_next) * cross).sum() / (3.0 * area2)
+        cy = ((y + y_next) * cross).sum() / (3.0 * area2)
+        return (float(cy), float(cx))
+    return (float(y.mean()), float(x.mean()))
+
+class RosreestrUnavailableError(Exception):
+    """Raised when the PKK API keeps failing after all retries."""
+
+@dataclass(slots=True)
 class PropertyInfo:
     """Data class for property information from Rosreestr."""
     cadastral_number: str
@@ -28,6 +153,71 @@ class PropertyInfo:
     building_year: Optional[int] = None
     floors: Optional[int] = None
     material: Optional[str] = None
+    
+    # Lazily filled lower-cased copies (slots leave no __dict__ for cached_property)
+    _permitted_use_lower: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    _address_lower: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    
+    @property
+    def permitted_use_lower(self) -> str:
+        """Lower-cased permitted use, computed once per instance."""
+        if self._permitted_use_lower is None:
+            self._permitted_use_lower = self.permitted_use.lower()
+        return self._permitted_use_lower
+    
+    @property
+    def address_lower(self) -> str:
+        """Lower-cased address, computed once per instance."""
+        if self._address_lower is None:
+            self._address_lower = self.address.lower()
+        return self._address_lower
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Field values as a plain dict (without cached helper attributes)."""
+        return {f.name: getattr(self, f.name) for f in _PROPERTY_INFO_FIELDS}
+
+# Public fields of PropertyInfo, resolved once for to_dict()
+_PROPERTY_INFO_FIELDS = tuple(f for f in fields(PropertyInfo) if f.init)
+
+# Pure parsing helpers: no I/O or service state, fully annotated so the parse
+# path can be compiled ahead of time (mypyc/Cython) without API changes
+
+def _geometry_centroid(geometry: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+    """(lat, lon) of a PKK point, or the outer-ring centroid of a (multi)polygon."""
+    geometry_type: Optional[str] = geometry.get('type')
+    coords: List[Any] = geometry.get('coordinates', [])
+    
+    if geometry_type == 'Point':
+        if len(coords) >= 2:
+            return (coords[1], coords[0])  # lat, lon
+    elif geometry_type == 'Polygon':
+        if coords:
+            return _ring_centroid(coords[0])
+    elif geometry_type == 'MultiPolygon':
+        if coords:
+            return _ring_centroid(coords[0][0])
+    
+    return None
+
+def _build_property(cadastral_number: str, feature: Dict[str, Any], extended: bool) -> PropertyInfo:
+    """Build PropertyInfo from a PKK feature using the attribute key tables."""
+    get = feature.get('attrs', {}).get
+    address, area, category, permitted_use, owner_type, registration_date = [
+        get(key, default) for key, default in _ATTR_KEYS_WITH_DEFAULTS
+    ]
+    cost: Optional[float] = None
+    building_year: Optional[int] = None
+    floors: Optional[int] = None
+    material: Optional[str] = None
+    if extended:
+        cost, building_year, floors, material = [get(key) for key in _EXTENDED_ATTR_KEYS]
+    
+    return PropertyInfo(
+        cadastral_number, address, float(area or 0), category, permitted_use,
+        owner_type, registration_date, cost,
+        _geometry_centroid(feature.get('geometry', {})),
+        building_year, floors, material
+    )
 
 class RosreestrService:
     """
@@ -40,6 +230,8 @@ class RosreestrService:
         self.base_url = "https://rosreestr.gov.ru/api/online"
         self.public_map_url = "https://pkk.rosreestr.ru/api"
         self.session = None
+        self._session_loop = None
+        self._semaphore = None
         
         # API endpoints
         self.endpoints = {
@@ -51,10 +243,27 @@ class RosreestrService:
         }
     
     async def _get_session(self):
-        """Get or create aiohttp session."""
-        if not self.session:
+        """Get or create the shared aiohttp session with a pooled connector."""
+        loop = asyncio.get_running_loop()
+        if self.session is not None and self._session_loop is not loop:
+            # aiohttp sessions are bound to the loop they were created on
+            self.session = None
+        if self.session is None or self.session.closed:
             timeout = aiohttp.ClientTimeout(total=30)
-            self.session = aiohttp.ClientSession(timeout=timeout)
+            # Non-blocking DNS via aiodns when installed, instead of getaddrinfo in a thread
+            resolver = aiohttp.AsyncResolver() if aiodns is not None else None
+            connector = aiohttp.TCPConnector(
+                resolver=resolver,
+                use_dns_cache=True,
+                limit=CONNECTION_POOL_LIMIT,
+                limit_per_host=CONNECTION_POOL_LIMIT_PER_HOST,
+                ttl_dns_cache=DNS_CACHE_TTL,
+                keepalive_timeout=KEEPALIVE_TIMEOUT
+            )
+            self.session = aiohttp.ClientSession(timeout=timeout, connector=connector)
+            self._session_loop = loop
+            # Created here so it binds to the same loop as the session
+            self._semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
         return self.session
     
     async def close_session(self):
@@ -62,8 +271,62 @@ class RosreestrService:
         if self.session:
             await self.session.close()
             self.session = None
+            self._session_loop = None
+    
+    async def _get(self, url: str, params: Optional[Dict[str, Any]] = None) -> Tuple[int, Optional[bytes]]:
+        """
+        GET a PKK resource, revalidating with a stored ETag when possible.
+        
+        A 304 answer reuses the body stored with the ETag, so refetches after
+        a result-cache expiry skip the transfer when upstream is unchanged.
+        
+        Transient failures (429/5xx, connection errors, timeouts) are retried
+        with exponential backoff and jitter.
+        
+        Returns:
+            (status, body) tuple; body is None for non-200 responses
+            
+        Raises:
+            RosreestrUnavailableError: if the request still fails after all retries
+        """
+        session = await self._get_session()
+        validator_key = cache._generate_key('rosreestr_etag', url, **(params or {}))
+        stored = await cache.aget(validator_key)
+        headers = {'If-None-Match': stored['etag']} if stored else None
+        
+        for attempt in range(RETRY_ATTEMPTS):
+            last_attempt = attempt == RETRY_ATTEMPTS - 1
+            try:
+                async with self._semaphore:
+                    async with session.get(url, params=params, headers=headers) as response:
+                        status = response.status
+                        if status == 200:
+                            body = await response.read()
+                            etag = response.headers.get('ETag')
+                if status not in RETRY_STATUSES:
+                    break
+                if last_attempt:
+                    raise RosreestrUnavailableError(f"PKK API returned {status} for {url}")
+                logger.warning(f"Rosreestr API returned {status}, retrying ({attempt + 1}/{RETRY_ATTEMPTS})")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if last_attempt:
+                    raise RosreestrUnavailableError(f"PKK API request failed: {str(e)}") from e
+                logger.warning(f"Rosreestr request error: {str(e)}, retrying ({attempt + 1}/{RETRY_ATTEMPTS})")
+            
+            await asyncio.sleep(RETRY_BACKOFF_BASE * 2 ** attempt + random.uniform(0, RETRY_JITTER))
+        
+        if status == 304 and stored:
+            # Unchanged upstream: extend the stored copy and reuse it
+            await cache.aset(validator_key, stored, ETAG_CACHE_TTL)
+            return 200, stored['body']
+        if status != 200:
+            return status, None
+        
+        if etag:
+            await cache.aset(validator_key, {'etag': etag, 'body': body}, ETAG_CACHE_TTL)
+        return status, body
     
-    @cached_function('rosreestr_address', ttl=86400)  # Cache for 24 hours
+    @cached_function('rosreestr_address', ttl=86400, negative_ttl=3600)  # Cache for 24 hours, misses for 1 hour
     async def search_by_address(self, address: str) -> List[Dict[str, Any]]:
         """
         Search properties by address.
@@ -75,8 +338,6 @@ class RosreestrService:
             List of property records
         """
         try:
-            session = await self._get_session()
-            
             # Use public PKK API for address search
             url = f"{self.public_map_url}/features/1"
             params = {
@@ -85,19 +346,21 @@ class RosreestrService:
                 'tolerance': 4
             }
             
-            async with session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return self._parse_search_results(data)
-                else:
-                    logger.warning(f"Rosreestr API error: {response.status}")
-                    return []
-                    
+            status, body = await self._get(url, params)
+            if status != 200:
+                logger.warning(f"Rosreestr API error: {status}")
+                return []
+            
+            return self._parse_search_results(_json_loads(body))
+            
+        except RosreestrUnavailableError:
+            # Not cached: let the caller see the outage instead of an empty result
+            raise
         except Exception as e:
             logger.error(f"Error searching by address: {str(e)}")
             return []
     
-    @cached_function('rosreestr_cadastral', ttl=86400)
+    @cached_function('rosreestr_cadastral', ttl=86400, negative_ttl=3600)
     async def get_property_by_cadastral_number(self, cadastral_number: str) -> Optional[PropertyInfo]:
         """
         Get property information by cadastral number.
@@ -108,26 +371,31 @@ class RosreestrService:
         Returns:
             PropertyInfo object or None
         """
+        if not _CN_RE.match(cadastral_number):
+            logger.warning(f"Invalid cadastral number format: {cadastral_number}")
+            return None
+        
         try:
-            session = await self._get_session()
-            
             # Use public PKK API
             url = f"{self.public_map_url}/features/1/{cadastral_number}"
             
-            async with session.get(url) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return self._parse_property_info(data, cadastral_number)
-                else:
-                    logger.warning(f"Property not found: {cadastral_number}")
-                    return None
-                    
+            status, body = await self._get(url)
+            if status != 200:
+                logger.warning(f"Property not found: {cadastral_number}")
+                return None
+            
+            return self._parse_property_info(_json_loads(body), cadastral_number)
+            
+        except RosreestrUnavailableError:
+            # Not cached: let the caller see the outage instead of an empty result
+            raise
         except Exception as e:
             logger.error(f"Error getting property info: {str(e)}")
             return None
     
-    @cached_function('rosreestr_coordinates', ttl=86400)
-    async def get_properties_by_coordinates(self, lat: float, lon: float, radius: int = 100) -> List[PropertyInfo]:
+    @cached_function('rosreestr_coordinates', ttl=86400, negative_ttl=3600)
+    async def get_properties_by_coordinates(self, lat: float, lon: float, radius: int = 100,
+                                            limit: int = 50) -> List[PropertyInfo]:
         """
         Get properties within radius of coordinates.
         
@@ -135,46 +403,90 @@ class RosreestrService:
             lat: Latitude
             lon: Longitude
             radius: Search radius in meters
+            limit: Maximum number of properties to return
             
         Returns:
             List of PropertyInfo objects
         """
         try:
-            session = await self._get_session()
-            
-            # Convert to Web Mercator projection (approximate)
-            x = lon * 20037508.34 / 180
-            y = lat * 20037508.34 / 180
+            # Convert to Web Mercator projection (EPSG:3857)
+            lat_rad = math.radians(lat)
+            x = lon * WEB_MERCATOR_HALF_EXTENT / 180
+            y = math.log(math.tan(math.pi / 4 + lat_rad / 2)) * WEB_MERCATOR_HALF_EXTENT / math.pi
             
-            # Create bounding box
-            buffer = radius * 0.00001  # Approximate conversion
+            # Create bounding box; Mercator metres stretch by 1/cos(lat) relative to ground metres
+            buffer = radius / math.cos(lat_rad)
             bbox = f"{x-buffer},{y-buffer},{x+buffer},{y+buffer}"
             
             url = f"{self.public_map_url}/features/1"
             params = {
                 'bbox': bbox,
-                'limit': 50
+                'limit': limit
             }
             
-            async with session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    properties = []
-                    
-                    for feature in data.get('features', []):
-                        prop_info = self._parse_feature_to_property(feature)
-                        if prop_info:
-                            properties.append(prop_info)
-                    
-                    return properties
-                else:
-                    logger.warning(f"Coordinate search failed: {response.status}")
-                    return []
-                    
+            status, body = await self._get(url, params)
+            if status != 200:
+                logger.warning(f"Coordinate search failed: {status}")
+                return []
+            
+            # Parse after the connection is back in the pool
+            properties = []
+            for feature in _json_loads(body).get('features', []):
+                prop_info = self._parse_feature_to_property(feature)
+                if prop_info:
+                    properties.append(prop_info)
+                    if len(properties) >= limit:
+                        break
+            
+            return properties
+            
+        except RosreestrUnavailableError:
+            # Not cached: let the caller see the outage instead of an empty result
+            raise
         except Exception as e:
             logger.error(f"Error searching by coordinates: {str(e)}")
             return []
     
+    async def get_properties_bulk(self, cadastral_numbers: List[str]) -> Dict[str, PropertyInfo]:
+        """
+        Get information for several properties with a single PKK request.
+        
+        Args:
+            cadastral_numbers: Cadastral numbers to look up
+            
+        Returns:
+            Mapping of cadastral number to PropertyInfo for the numbers found
+        """
+        cadastral_numbers = list(dict.fromkeys(cn for cn in cadastral_numbers if cn and _CN_RE.match(cn)))
+        if not cadastral_numbers:
+            return {}
+        
+        try:
+            url = f"{self.public_map_url}/features/1"
+            params = {
+                'text': '|'.join(cadastral_numbers),
+                'limit': len(cadastral_numbers)
+            }
+            
+            status, body = await self._get(url, params)
+            if status != 200:
+                logger.warning(f"Bulk cadastral search failed: {status}")
+                return {}
+            
+            data = _json_loads(body)
+            requested = set(cadastral_numbers)
+            properties = {}
+            for feature in data.get('features', []):
+                prop_info = self._parse_feature_to_property(feature)
+                if prop_info and prop_info.cadastral_number in requested:
+                    properties[prop_info.cadastral_number] = prop_info
+            
+            return properties
+            
+        except Exception as e:
+            logger.error(f"Error getting properties in bulk: {str(e)}")
+            return {}
+    
     async def validate_property_usage(self, cadastral_number: str, current_usage: str) -> Dict[str, Any]:
         """
         Validate if current property usage matches permitted usage.
@@ -188,91 +500,96 @@ class RosreestrService:
         """
         try:
             property_info = await self.get_property_by_cadastral_number(cadastral_number)
+            return self._usage_validation_result(property_info, current_usage)
             
-            if not property_info:
-                return {
-                    'valid': False,
-                    'error': 'Property not found',
-                    'compliance': 'unknown'
-                }
-            
-            # Define usage mappings
-            usage_mappings = {
-                'residential': ['жилая', 'многоквартирный дом', 'индивидуальное жилищное строительство'],
-                'commercial': ['торговля', 'офис', 'коммерческая', 'предпринимательство'],
-                'industrial': ['производство', 'промышленность', 'склад'],
-                'public': ['образование', 'здравоохранение', 'культура', 'спорт']
+        except Exception as e:
+            logger.error(f"Error validating property usage: {str(e)}")
+            return {
+                'valid': False,
+                'error': str(e),
+                'compliance': 'unknown'
             }
+    
+    async def validate_properties_usage(self, cadastral_numbers: List[str],
+                                        current_usage: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Validate usage of several properties, fetching them in one batch.
+        
+        Args:
+            cadastral_numbers: Property cadastral numbers
+            current_usage: Current observed usage
             
-            permitted_use = property_info.permitted_use.lower()
-            current_usage_lower = current_usage.lower()
-            
-            # Check compliance
-            is_compliant = False
-            for usage_type, keywords in usage_mappings.items():
-                if any(keyword in permitted_use for keyword in keywords):
-                    if usage_type in current_usage_lower:
-                        is_compliant = True
-                        break
-            
+        Returns:
+            Mapping of cadastral number to validation result
+        """
+        try:
+            properties = await self.get_properties_bulk(cadastral_numbers)
             return {
-                'valid': True,
-                'property_info': property_info.__dict__,
-                'permitted_use': property_info.permitted_use,
-                'current_usage': current_usage,
-                'compliance': 'compliant' if is_compliant else 'violation',
-                'violation_type': 'usage_mismatch' if not is_compliant else None
+                cn: self._usage_validation_result(properties.get(cn), current_usage)
+                for cn in cadastral_numbers
             }
             
         except Exception as e:
             logger.error(f"Error validating property usage: {str(e)}")
+            return {
+                cn: {'valid': False, 'error': str(e), 'compliance': 'unknown'}
+                for cn in cadastral_numbers
+            }
+    
+    def _usage_validation_result(self, property_info: Optional[PropertyInfo],
+                                 current_usage: str) -> Dict[str, Any]:
+        """Compare permitted usage of a property with the observed usage."""
+        if not property_info:
             return {
                 'valid': False,
-                'error': str(e),
+                'error': 'Property not found',
                 'compliance': 'unknown'
             }
+        
+        permitted_use = property_info.permitted_use_lower
+        current_usage_lower = current_usage.lower()
+        
+        # Usage types whose keywords appear in the permitted use
+        usage_types = {
+            _USAGE_KEYWORD_TAGS[match.group(1)]
+            for match in _USAGE_KEYWORD_PATTERN.finditer(permitted_use)
+        }
+        
+        # Check compliance
+        is_compliant = any(usage_type in current_usage_lower for usage_type in usage_types)
+        
+        return {
+            'valid': True,
+            'property_info': property_info.to_dict(),
+            'permitted_use': property_info.permitted_use,
+            'current_usage': current_usage,
+            'compliance': 'compliant' if is_compliant else 'violation',
+            'violation_type': 'usage_mismatch' if not is_compliant else None
+        }
     
     def _parse_search_results(self, data: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Parse search results from PKK API."""
         results = []
-        
+                
         for feature in data.get('features', []):
-            attrs = feature.get('attrs', {})
-            geometry = feature.get('geometry', {})
-            
-            result = {
-                'cadastral_number': attrs.get('cn', ''),
-                'address': attrs.get('address', ''),
-                'area': attrs.get('area_value', 0),
-                'category': attrs.get('category_type', ''),
-                'coordinates': self._extract_coordinates(geometry)
-            }
+            get = feature.get('attrs', {}).get
+            cadastral_number = get('cn', '')
             
-            if result['cadastral_number']:
-                results.append(result)
+            if cadastral_number:
+                results.append({
+                    'cadastral_number': cadastral_number,
+                    'address': get('address', ''),
+                    'area': get('area_value', 0),
+                    'category': get('category_type', ''),
+                    'coordinates': self._extract_coordinates(feature.get('geometry', {}))
+                })
         
         return results
     
     def _parse_property_info(self, data: Dict[str, Any], cadastral_number: str) -> Optional[PropertyInfo]:
         """Parse property information from API response."""
         try:
-            feature = data.get('feature', {})
-            attrs = feature.get('attrs', {})
-            
-            return PropertyInfo(
-                cadastral_number=cadastral_number,
-                address=attrs.get('address', ''),
-                area=float(attrs.get('area_value', 0)),
-                category=attrs.get('category_type', ''),
-                permitted_use=attrs.get('util_by_doc', 'Не определено'),
-                owner_type=attrs.get('form_of_ownership', ''),
-                registration_date=attrs.get('date_create', ''),
-                cost=attrs.get('cad_cost'),
-                coordinates=self._extract_coordinates(feature.get('geometry', {})),
-                building_year=attrs.get('year_built'),
-                floors=attrs.get('floors'),
-                material=attrs.get('material')
-            )
+            return _build_property(cadastral_number, data.get('feature', {}), extended=True)
             
         except Exception as e:
             logger.error(f"Error parsing property info: {str(e)}")
@@ -281,22 +598,12 @@ class RosreestrService:
     def _parse_feature_to_property(self, feature: Dict[str, Any]) -> Optional[PropertyInfo]:
         """Convert feature to PropertyInfo object."""
         try:
-            attrs = feature.get('attrs', {})
-            cadastral_number = attrs.get('cn', '')
+            cadastral_number = feature.get('attrs', {}).get('cn', '')
             
             if not cadastral_number:
                 return None
             
-            return PropertyInfo(
-                cadastral_number=cadastral_number,
-                address=attrs.get('address', ''),
-                area=float(attrs.get('area_value', 0)),
-                category=attrs.get('category_type', ''),
-                permitted_use=attrs.get('util_by_doc', 'Не определено'),
-                owner_type=attrs.get('form_of_ownership', ''),
-                registration_date=attrs.get('date_create', ''),
-                coordinates=self._extract_coordinates(feature.get('geometry', {}))
-            )
+            return _build_property(cadastral_number, feature, extended=False)
             
         except Exception as e:
             logger.error(f"Error parsing feature: {str(e)}")
@@ -305,26 +612,7 @@ class RosreestrService:
     def _extract_coordinates(self, geometry: Dict[str, Any]) -> Optional[Tuple[float, float]]:
         """Extract coordinates from geometry object."""
         try:
-            if geometry.get('type') == 'Point':
-                coords = geometry.get('coordinates', [])
-                if len(coords) >= 2:
-                    return (coords[1], coords[0])  # lat, lon
-            elif geometry.get('type') in ['Polygon', 'MultiPolygon']:
-                # Get centroid of polygon
-                coords = geometry.get('coordinates', [])
-                if coords:
-                    # Simplified centroid calculation
-                    if geometry.get('type') == 'Polygon':
-                        ring = coords[0]
-                    else:
-                        ring = coords[0][0]
-                    
-                    if ring:
-                        avg_lon = sum(point[0] for point in ring) / len(ring)
-                        avg_lat = sum(point[1] for point in ring) / len(ring)
-                        return (avg_lat, avg_lon)
-            
-            return None
+            return _geometry_centroid(geometry)
             
         except Exception as e:
             logger.error(f"Error extracting coordinates: {str(e)}")
@@ -346,24 +634,27 @@ class RosreestrService:
             properties = await self.get_properties_by_coordinates(lat, lon, radius=50)
             violations = []
             
+            # Resolve the requested checks once for all properties
+            checks = [
+                (violation_type, self._VIOLATION_CHECKS[violation_type])
+                for violation_type in violation_types
+                if violation_type in self._VIOLATION_CHECKS
+            ]
+            
             for prop in properties:
-                # Check for common violations
-                violation_checks = {
-                    'unauthorized_construction': self._check_unauthorized_construction,
-                    'usage_violation': self._check_usage_violation,
-                    'boundary_violation': self._check_boundary_violation
-                }
+                prop_dict = None
                 
-                for violation_type in violation_types:
-                    if violation_type in violation_checks:
-                        check_result = violation_checks[violation_type](prop)
-                        if check_result['has_violation']:
-                            violations.append({
-                                'property': prop.__dict__,
-                                'violation_type': violation_type,
-                                'details': check_result['details'],
-                                'severity': check_result.get('severity', 'medium')
-                            })
+                for violation_type, check in checks:
+                    check_result = check(self, prop)
+                    if check_result['has_violation']:
+                        if prop_dict is None:
+                            prop_dict = prop.to_dict()
+                        violations.append({
+                            'property': prop_dict,
+                            'violation_type': violation_type,
+                            'details': check_result['details'],
+                            'severity': check_result.get('severity', 'medium')
+                        })
             
             return violations
             
@@ -399,8 +690,8 @@ class RosreestrService:
         details = []
         
         # Check for residential properties with commercial indicators
-        if 'жилая' in property_info.permitted_use.lower():
-            if any(word in property_info.address.lower() for word in ['магазин', 'офис', 'салон']):
+        if 'жилая' in property_info.permitted_use_lower:
+            if _COMMERCIAL_ADDRESS_PATTERN.search(property_info.address_lower):
                 has_violation = True
                 details.append("Возможное коммерческое использование жилого помещения")
         
@@ -424,36 +715,57 @@ class RosreestrService:
             'details': details,
             'severity': 'low'
         }
+    
+    # Common violation checks by type, built once with the class
+    _VIOLATION_CHECKS = {
+        'unauthorized_construction': _check_unauthorized_construction,
+        'usage_violation': _check_usage_violation,
+        'boundary_violation': _check_boundary_violation
+    }
+
+# Long-lived service instance shared by the synchronous wrappers
+_service = RosreestrService()
+
+# Persistent event loop running in a daemon thread; keeps the shared
+# aiohttp session bound to a single loop for the life of the process
+_loop = asyncio.new_event_loop()
+_loop_thread = threading.Thread(target=_loop.run_forever, name='rosreestr-loop', daemon=True)
+_loop_thread.start()
+
+def _run(coro):
+    """Run a coroutine on the background loop and wait for its result."""
+    return asyncio.run_coroutine_threadsafe(coro, _loop).result()
+
+@atexit.register
+def _close_service_session():
+    """Close the shared aiohttp session and stop the background loop."""
+    if _loop.is_closed():
+        return
+    try:
+        asyncio.run_coroutine_threadsafe(_service.close_session(), _loop).result(timeout=5)
+    except Exception as e:
+        logger.debug(f"Error closing Rosreestr session: {str(e)}")
+    finally:
+        _loop.call_soon_threadsafe(_loop.stop)
 
 # Synchronous wrapper functions for Flask integration
 def sync_search_by_address(address: str) -> List[Dict[str, Any]]:
     """Synchronous wrapper for address search."""
-    service = RosreestrService()
-    try:
-        return asyncio.run(service.search_by_address(address))
-    finally:
-        asyncio.run(service.close_session())
+    return _run(_service.search_by_address(address))
 
 def sync_get_property_by_cadastral_number(cadastral_number: str) -> Optional[PropertyInfo]:
     """Synchronous wrapper for cadastral number search."""
-    service = RosreestrService()
-    try:
-        return asyncio.run(service.get_property_by_cadastral_number(cadastral_number))
-    finally:
-        asyncio.run(service.close_session())
+    return _run(_service.get_property_by_cadastral_number(cadastral_number))
 
 def sync_validate_property_usage(cadastral_number: str, current_usage: str) -> Dict[str, Any]:
     """Synchronous wrapper for property usage validation."""
-    service = RosreestrService()
-    try:
-        return asyncio.run(service.validate_property_usage(cadastral_number, current_usage))
-    finally:
-        asyncio.run(service.close_session())
+    return _run(_service.validate_property_usage(cadastral_number, current_usage))
+
+def sync_validate_properties_usage(cadastral_numbers: List[str], current_usage: str) -> Dict[str, Dict[str, Any]]:
+    """Synchronous wrapper for batched property usage validation."""
+    return _run(_service.validate_properties_usage(cadastral_numbers, current_usage))
 
-def sync_get_properties_by_coordinates(lat: float, lon: float, radius: int = 100) -> List[PropertyInfo]:
+def sync_get_properties_by_coordinates(lat: float, lon: float, radius: int = 100,
+                                       limit: int = 50) -> List[PropertyInfo]:
     """Synchronous wrapper for coordinate-based search."""
-    service = RosreestrService()
-    try:
-        return asyncio.run(service.get_properties_by_coordinates(lat, lon, radius))
-    finally:
-        asyncio.run(service.close_session())
+    return _run(_service.get_properties_by_coordinates(lat, lon, radius, limit))
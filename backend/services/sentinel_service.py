@@ -4,29 +4,260 @@ Provides access to Sentinel-2 satellite imagery and analysis capabilities
 """
 
 import os
+import atexit
 import asyncio
+import threading
+import weakref
 import aiohttp
+import io
 import json
+import time
+import struct
+import hashlib
+import tarfile
 import base64
 import logging
-import requests
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+from functools import lru_cache
+from itertools import combinations
 from dataclasses import dataclass
+import numpy as np
+from cachetools import TTLCache
+from rasterio.io import MemoryFile
 from .cache_service import CacheService
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+def _json_loads(content: bytes) -> Any:
+    """Parse JSON (with orjson when available)"""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+def _json_dumps(obj: Any) -> str:
+    """Serialize request payloads (with orjson when available)"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj)
+
+# Maximum number of time series intervals analysed concurrently
+TIME_SERIES_CONCURRENCY = 8
+
+# Band identifiers accepted by the generic evalscript, in canonical order
+_ALL_BANDS = ("B02", "B03", "B04", "B08", "B11", "B12")
+_EVALSCRIPT_BANDS = frozenset(_ALL_BANDS)
+
+# True color RGB evalscript
+_RGB_EVALSCRIPT = """
+//VERSION=3
+function setup() {
+    return {
+        input: ["B02", "B03", "B04"],
+        output: { bands: 3 }
+    };
+}
+
+function evaluatePixel(sample) {
+    return [sample.B04 * 2.5, sample.B03 * 2.5, sample.B02 * 2.5];
+}
+"""
+
+# NDVI and built-up analysis evalscript
+_ANALYSIS_EVALSCRIPT = """
+//VERSION=3
+function setup() {
+    return {
+        input: ["B02", "B03", "B04", "B08", "B11", "SCL", "dataMask"],
+        output: { bands: 4, sampleType: "FLOAT32" }
+    };
+}
+
+function evaluatePixel(sample) {
+    // No data: excluded from the statistics
+    if (!sample.dataMask) {
+        return [NaN, NaN, NaN, NaN];
+    }
+
+    // NDVI calculation
+    let ndvi = (sample.B08 - sample.B04) / (sample.B08 + sample.B04);
+
+    // Built-up index (simplified)
+    let builtUp = (sample.B11 - sample.B08) / (sample.B11 + sample.B08);
+
+    // Water detection (NDWI)
+    let water = (sample.B03 - sample.B08) / (sample.B03 + sample.B08);
+
+    // Cloud mask from SCL
+    let cloud = sample.SCL === 9 || sample.SCL === 10 ? 1 : 0;
+
+    return [ndvi, builtUp, water, cloud];
+}
+"""
+
+@lru_cache(maxsize=32)
+def _build_evalscript(bands: Tuple[str, ...]) -> str:
+    """Evalscript for a band combination (memoised; bands keep their order)"""
+    if set(bands) >= {"B02", "B03", "B04"}:
+        return _RGB_EVALSCRIPT
+    
+    # Default evalscript for any bands
+    known_bands = [band for band in bands if band in _EVALSCRIPT_BANDS]
+    band_inputs = ', '.join(f'"{band}"' for band in known_bands)
+    band_samples = ', '.join(f'sample.{band}' for band in known_bands)
+    return f"""
+//VERSION=3
+function setup() {{
+    return {{
+        input: [{band_inputs}],
+        output: {{ bands: {len(known_bands)} }}
+    }};
+}}
+
+function evaluatePixel(sample) {{
+    return [{band_samples}];
+}}
+"""
+
+# Scripts for every canonically ordered band combination, built once at
+# import; output channel order follows the request, so other orderings
+# fall back to the memoised builder
+_EVALSCRIPTS: Dict[Tuple[str, ...], str] = {
+    combo: _build_evalscript(combo)
+    for size in range(1, len(_ALL_BANDS) + 1)
+    for combo in combinations(_ALL_BANDS, size)
+}
+
+# Recently used time series kept in-process in front of Redis (LRU-evicted)
+TIME_SERIES_MEMORY_CACHE_SIZE = 128
+TIME_SERIES_CACHE_TTL = 7200  # 2 hours
+
+# Raster size for the single multi-temporal time series request; the
+# statistics are area means, so a coarse grid keeps the response small
+TIME_SERIES_RASTER_SIZE = 64
+
+# Multi-temporal evalscript: one acquisition per orbit, four bands per
+# acquisition (NDVI, built-up index, NDWI, cloud flag); acquisition dates
+# are returned in userdata.json
+_MULTITEMPORAL_EVALSCRIPT = """
+//VERSION=3
+function setup() {
+    return {
+        input: [{ bands: ["B03", "B04", "B08", "B11", "SCL", "dataMask"] }],
+        output: { id: "default", bands: 4, sampleType: "FLOAT32" },
+        mosaicking: "ORBIT"
+    };
+}
+
+function updateOutput(outputs, collection) {
+    outputs.default.bands = collection.scenes.length * 4;
+}
+
+function updateOutputMetadata(scenes, inputMetadata, outputMetadata) {
+    outputMetadata.userData = { dates: scenes.orbits.map(function (orbit) { return orbit.dateFrom; }) };
+}
+
+function evaluatePixel(samples) {
+    let result = [];
+    for (let i = 0; i < samples.length; i++) {
+        let sample = samples[i];
+        if (!sample.dataMask) {
+            result.push(NaN, NaN, NaN, NaN);
+            continue;
+        }
+        let ndvi = (sample.B08 - sample.B04) / (sample.B08 + sample.B04);
+        let builtUp = (sample.B11 - sample.B08) / (sample.B11 + sample.B08);
+        let water = (sample.B03 - sample.B08) / (sample.B03 + sample.B08);
+        let cloud = sample.SCL === 9 || sample.SCL === 10 ? 1 : 0;
+        result.push(ndvi, builtUp, water, cloud);
+    }
+    return result;
+}
+"""
+
+# Persistent event loop for the synchronous wrappers; keeps each service's
+# aiohttp session and connection pool alive across Flask requests
+_loop = asyncio.new_event_loop()
+_loop_thread = threading.Thread(target=_loop.run_forever, name='sentinel-loop', daemon=True)
+_loop_thread.start()
+
+# Services whose sessions are closed at shutdown
+_services = weakref.WeakSet()
+
+def _run_sync(coro):
+    """Run a coroutine on the background loop and wait for its result"""
+    return asyncio.run_coroutine_threadsafe(coro, _loop).result()
+
+@atexit.register
+def _shutdown_loop():
+    """Close open sessions and stop the background loop"""
+    if _loop.is_closed():
+        return
+    for service in list(_services):
+        try:
+            asyncio.run_coroutine_threadsafe(service.aclose(), _loop).result(timeout=5)
+        except Exception as e:
+            logger.debug(f"Error closing Sentinel Hub session: {e}")
+    _loop.call_soon_threadsafe(_loop.stop)
+
+RESPONSE_CHUNK_SIZE = 64 * 1024
+
+# Only this much of an error body is read for logging
+ERROR_BODY_LIMIT = 4096
+
+async def _read_error_text(response: aiohttp.ClientResponse) -> str:
+    """First ERROR_BODY_LIMIT bytes of an error response, decoded leniently"""
+    return (await response.content.read(ERROR_BODY_LIMIT)).decode(errors="replace")
+
+async def _read_body(response: aiohttp.ClientResponse) -> bytearray:
+    """
+    Stream a response body into a single buffer, sized up front from
+    Content-Length when the server sends it
+    """
+    expected = int(response.headers.get('content-length', '0') or 0)
+    buf = bytearray(expected)
+    view = memoryview(buf)
+    offset = 0
+    async for chunk in response.content.iter_chunked(RESPONSE_CHUNK_SIZE):
+        end = offset + len(chunk)
+        if end <= expected:
+            view[offset:end] = chunk
+        else:
+            view.release()
+            del buf[offset:]
+            buf.extend(chunk)
+            view = memoryview(buf)
+            expected = end
+        offset = end
+    view.release()
+    if offset < len(buf):
+        del buf[offset:]
+    return buf
+
 @dataclass
 class SatelliteImage:
     """Satellite image data structure"""
-    image_url: str
+    image_bytes: Union[bytes, bytearray]
     acquisition_date: str
     cloud_coverage: float
     bbox: List[float]
     resolution: int
     bands: List[str]
     metadata: Dict[str, Any]
+    image_format: str = 'image/png'
+    
+    def to_data_url(self) -> str:
+        """Encode the image as a data URL (only where a response needs one)"""
+        return f"data:{self.image_format};base64,{base64.b64encode(self.image_bytes).decode()}"
+    
+    @property
+    def image_url(self) -> str:
+        """Data URL of the image, built on demand"""
+        return self.to_data_url()
 
 @dataclass
 class ImageAnalysis:
@@ -38,6 +269,90 @@ class ImageAnalysis:
     cloud_coverage: float
     change_detection: Optional[Dict[str, Any]] = None
 
+def _analysis_from_bands(
+    ndvi: np.ndarray,
+    built_up: np.ndarray,
+    water: np.ndarray,
+    cloud: np.ndarray
+) -> Optional[ImageAnalysis]:
+    """Reduce per-pixel index arrays to an ImageAnalysis (NaN pixels are ignored)"""
+    valid = ~np.isnan(ndvi)
+    if not valid.any():
+        return None
+    
+    ndvi = ndvi[valid]
+    built_up = built_up[valid]
+    water = water[valid]
+    cloud = cloud[valid]
+    
+    return ImageAnalysis(
+        vegetation_index=float(ndvi.mean()),
+        built_up_area=float((built_up > 0).mean()),
+        water_bodies=float((water > 0).mean()),
+        bare_soil=float(((ndvi < 0.2) & (built_up <= 0) & (water <= 0)).mean()),
+        cloud_coverage=float(cloud.mean() * 100)
+    )
+
+# Quantised cache encoding of an ImageAnalysis: five unsigned bytes
+# (NDVI mapped from [-1, 1], area fractions from [0, 1], cloud cover from [0, 100] %)
+_ANALYSIS_STRUCT = struct.Struct('<5B')
+
+def _quantize(value: float, low: float, high: float) -> int:
+    return int(round((min(max(value, low), high) - low) / (high - low) * 255))
+
+def _dequantize(value: int, low: float, high: float) -> float:
+    return low + value / 255 * (high - low)
+
+def _pack_analysis(analysis: ImageAnalysis) -> bytes:
+    """Pack an analysis into 5 bytes (~0.4% precision); change_detection is not kept"""
+    return _ANALYSIS_STRUCT.pack(
+        _quantize(analysis.vegetation_index, -1.0, 1.0),
+        _quantize(analysis.built_up_area, 0.0, 1.0),
+        _quantize(analysis.water_bodies, 0.0, 1.0),
+        _quantize(analysis.bare_soil, 0.0, 1.0),
+        _quantize(analysis.cloud_coverage, 0.0, 100.0)
+    )
+
+def _unpack_analyses(data: bytes) -> List[ImageAnalysis]:
+    """Unpack a concatenation of packed analyses"""
+    return [
+        ImageAnalysis(
+            vegetation_index=_dequantize(ndvi, -1.0, 1.0),
+            built_up_area=_dequantize(built_up, 0.0, 1.0),
+            water_bodies=_dequantize(water, 0.0, 1.0),
+            bare_soil=_dequantize(bare_soil, 0.0, 1.0),
+            cloud_coverage=_dequantize(cloud, 0.0, 100.0)
+        )
+        for ndvi, built_up, water, bare_soil, cloud in _ANALYSIS_STRUCT.iter_unpack(data)
+    ]
+
+def _time_series_intervals(start_date: str, end_date: str, interval_days: int) -> List[Tuple[str, str]]:
+    """Inclusive (from, to) date pairs of interval_days covering [start_date, end_date]"""
+    end = np.datetime64(end_date, 'D')
+    starts = np.arange(np.datetime64(start_date, 'D'), end + 1, interval_days + 1)
+    ends = np.minimum(starts + interval_days, end)
+    return list(zip(starts.astype(str).tolist(), ends.astype(str).tolist()))
+
+def _parse_multitemporal_response(data: bytes) -> Tuple[List[str], np.ndarray]:
+    """
+    Unpack a multi-temporal Process API tar response
+    
+    Returns:
+        Acquisition dates (YYYY-MM-DD) and an array of shape (scenes, 4, height, width)
+    """
+    with tarfile.open(fileobj=io.BytesIO(data)) as tar:
+        tiff_data = tar.extractfile('default.tif').read()
+        userdata = _json_loads(tar.extractfile('userdata.json').read())
+    
+    with MemoryFile(tiff_data) as memfile, memfile.open() as dataset:
+        bands = dataset.read()
+    
+    dates = [date[:10] for date in userdata.get('dates', [])]
+    if bands.shape[0] != len(dates) * 4:
+        raise ValueError(f"Unexpected band count {bands.shape[0]} for {len(dates)} acquisitions")
+    
+    return dates, bands.reshape(len(dates), 4, *bands.shape[1:])
+
 class SentinelHubService:
     """Service for Sentinel Hub satellite imagery integration"""
     
@@ -47,62 +362,161 @@ class SentinelHubService:
         self.oauth_url = "https://services.sentinel-hub.com/oauth/token"
         self.process_url = "https://services.sentinel-hub.com/api/v1/process"
         
-        # Rate limiting
-        self.last_request_time = 0
-        self.min_request_interval = 0.1  # 100ms between requests
+        # Rate limiting (token bucket: average 10 requests/s, bursts of up to 10)
+        self.rate_limit_per_second = 10.0
+        self.rate_limit_burst = 10.0
+        self._tokens = self.rate_limit_burst
+        self._last_refill = 0.0
+        self._rate_lock: Optional[asyncio.Lock] = None
+        self._rate_lock_loop: Optional[asyncio.AbstractEventLoop] = None
         
         # Authentication (will need to be configured)
         self.client_id = None
         self.client_secret = None
         self.access_token = None
         self.token_expires_at = None
+        
+        # Shared HTTP session (created lazily on the running loop)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+        _services.add(self)
+        
+        # Upstream requests in flight, keyed by cache key
+        self._inflight: Dict[str, asyncio.Future] = {}
+        
+        # Bounded L1 for time series so hot queries skip the Redis round-trip
+        self._ts_memory_cache = TTLCache(
+            maxsize=TIME_SERIES_MEMORY_CACHE_SIZE, ttl=TIME_SERIES_CACHE_TTL
+        )
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Get or create the pooled aiohttp session"""
+        loop = asyncio.get_running_loop()
+        if self._session is not None and self._session_loop is not loop:
+            # aiohttp sessions are bound to the loop they were created on
+            self._session = None
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=32, ttl_dns_cache=300, keepalive_timeout=75),
+                timeout=aiohttp.ClientTimeout(total=60),
+                json_serialize=_json_dumps
+            )
+            self._session_loop = loop
+        return self._session
+    
+    async def aclose(self):
+        """Close the shared aiohttp session"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+            self._session_loop = None
     
     def configure_credentials(self, client_id: str, client_secret: str):
         """Configure Sentinel Hub credentials"""
         self.client_id = client_id
         self.client_secret = client_secret
     
+    async def _singleflight(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fetch() once per key at a time; concurrent callers await the same result"""
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+        
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await fetch()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else is waiting
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+    
+    @staticmethod
+    def _key(tag: str, *parts) -> str:
+        """Compact cache key: tag plus a 128-bit BLAKE2b digest of the parameters"""
+        digest = hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+        return f"sh:{tag}:{digest}"
+    
     async def _ensure_rate_limit(self):
-        """Ensure rate limiting compliance"""
-        current_time = asyncio.get_event_loop().time()
-        time_since_last = current_time - self.last_request_time
-        if time_since_last < self.min_request_interval:
-            await asyncio.sleep(self.min_request_interval - time_since_last)
-        self.last_request_time = asyncio.get_event_loop().time()
+        """Ensure rate limiting compliance (token bucket)"""
+        loop = asyncio.get_running_loop()
+        if self._rate_lock is None or self._rate_lock_loop is not loop:
+            self._rate_lock = asyncio.Lock()
+            self._rate_lock_loop = loop
+        
+        async with self._rate_lock:
+            now = loop.time()
+            elapsed = max(0.0, now - self._last_refill)
+            self._tokens = min(self.rate_limit_burst, self._tokens + elapsed * self.rate_limit_per_second)
+            self._last_refill = now
+            
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            
+            # Wait until one token has accumulated, then spend it
+            await asyncio.sleep((1 - self._tokens) / self.rate_limit_per_second)
+            self._tokens = 0.0
+            self._last_refill = loop.time()
     
     async def _get_access_token(self) -> str:
         """Get or refresh access token"""
+        # L1: token held by this process (expiry on the monotonic clock)
         if (self.access_token and self.token_expires_at and 
-            datetime.now().timestamp() < self.token_expires_at):
+            time.monotonic() < self.token_expires_at):
             return self.access_token
         
         if not self.client_id or not self.client_secret:
             raise ValueError("Sentinel Hub credentials not configured")
         
+        # L2: token shared by all workers through the cache service
+        token_cache_key = f"sentinel:oauth_token:{self.client_id}"
+        cached_token = await self.cache_service.aget(token_cache_key)
+        if cached_token:
+            # The shared expiry is wall-clock so every worker can read it
+            remaining = cached_token['exp'] - time.time()
+            if remaining > 30:
+                self.access_token = cached_token['token']
+                self.token_expires_at = time.monotonic() + remaining
+                return self.access_token
+        
         await self._ensure_rate_limit()
         
-        async with aiohttp.ClientSession() as session:
-            data = {
-                'grant_type': 'client_credentials',
-                'client_id': self.client_id,
-                'client_secret': self.client_secret
-            }
-            
-            try:
-                async with session.post(self.oauth_url, data=data) as response:
-                    if response.status == 200:
-                        token_data = await response.json()
-                        self.access_token = token_data['access_token']
-                        expires_in = token_data.get('expires_in', 3600)
-                        self.token_expires_at = datetime.now().timestamp() + expires_in - 60
-                        return self.access_token
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"Failed to get access token: {response.status} - {error_text}")
-                        raise Exception(f"Authentication failed: {response.status}")
-            except Exception as e:
-                logger.error(f"Error getting access token: {e}")
-                raise
+        session = await self._get_session()
+        data = {
+            'grant_type': 'client_credentials',
+            'client_id': self.client_id,
+            'client_secret': self.client_secret
+        }
+        
+        try:
+            async with session.post(self.oauth_url, data=data) as response:
+                if response.status == 200:
+                    token_data = _json_loads(await response.read())
+                    self.access_token = token_data['access_token']
+                    expires_in = token_data.get('expires_in', 3600)
+                    self.token_expires_at = time.monotonic() + expires_in - 60
+                    await self.cache_service.aset(
+                        token_cache_key,
+                        {'token': self.access_token, 'exp': time.time() + expires_in - 60},
+                        ttl=max(1, expires_in - 60)
+                    )
+                    return self.access_token
+                else:
+                    error_text = await _read_error_text(response)
+                    logger.error(f"Failed to get access token: {response.status} - {error_text}")
+                    raise Exception(f"Authentication failed: {response.status}")
+        except Exception as e:
+            logger.error(f"Error getting access token: {e}")
+            raise
     
     async def get_satellite_image(
         self, 
@@ -124,16 +538,35 @@ class SentinelHubService:
             max_cloud_coverage: Maximum cloud coverage percentage
             bands: List of bands to include
         """
-        cache_key = f"sentinel_image:{':'.join(map(str, bbox))}:{date_from}:{date_to}:{resolution}"
+        if bands is None:
+            bands = ["B02", "B03", "B04", "B08"]  # Blue, Green, Red, NIR
+        
+        cache_key = self._key("img", bbox, date_from, date_to, resolution, max_cloud_coverage, bands)
         
         # Check cache first
-        cached_result = await self.cache_service.get(cache_key)
+        cached_result = await self.cache_service.aget(cache_key)
         if cached_result:
             return SatelliteImage(**cached_result)
         
-        if bands is None:
-            bands = ["B02", "B03", "B04", "B08"]  # Blue, Green, Red, NIR
-        
+        # Identical concurrent misses share one upstream request
+        return await self._singleflight(
+            cache_key,
+            lambda: self._fetch_satellite_image(
+                cache_key, bbox, date_from, date_to, resolution, max_cloud_coverage, bands
+            )
+        )
+    
+    async def _fetch_satellite_image(
+        self,
+        cache_key: str,
+        bbox: List[float],
+        date_from: str,
+        date_to: str,
+        resolution: int,
+        max_cloud_coverage: float,
+        bands: List[str]
+    ) -> Optional[SatelliteImage]:
+        """Download a satellite image from the Process API and cache it"""
         try:
             access_token = await self._get_access_token()
             await self._ensure_rate_limit()
@@ -172,45 +605,44 @@ class SentinelHubService:
                 'Content-Type': 'application/json'
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    self.process_url, 
-                    json=payload, 
-                    headers=headers
-                ) as response:
-                    if response.status == 200:
-                        image_data = await response.read()
-                        image_url = f"data:image/png;base64,{base64.b64encode(image_data).decode()}"
-                        
-                        # Get metadata from headers if available
-                        metadata = {
-                            'content_type': response.headers.get('content-type', ''),
-                            'content_length': response.headers.get('content-length', ''),
-                            'processing_time': response.headers.get('x-processing-time', '')
-                        }
-                        
-                        satellite_image = SatelliteImage(
-                            image_url=image_url,
-                            acquisition_date=date_to,  # Use end date as acquisition
-                            cloud_coverage=max_cloud_coverage,  # Approximation
-                            bbox=bbox,
-                            resolution=resolution,
-                            bands=bands,
-                            metadata=metadata
-                        )
-                        
-                        # Cache the result
-                        await self.cache_service.set(
-                            cache_key, 
-                            satellite_image.__dict__, 
-                            ttl=3600  # 1 hour
-                        )
-                        
-                        return satellite_image
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"Failed to get satellite image: {response.status} - {error_text}")
-                        return None
+            session = await self._get_session()
+            async with session.post(
+                self.process_url, 
+                json=payload, 
+                headers=headers
+            ) as response:
+                if response.status == 200:
+                    image_data = await _read_body(response)
+                    
+                    # Get metadata from headers if available
+                    metadata = {
+                        'content_type': response.headers.get('content-type', ''),
+                        'content_length': response.headers.get('content-length', ''),
+                        'processing_time': response.headers.get('x-processing-time', '')
+                    }
+                    
+                    satellite_image = SatelliteImage(
+                        image_bytes=image_data,
+                        acquisition_date=date_to,  # Use end date as acquisition
+                        cloud_coverage=max_cloud_coverage,  # Approximation
+                        bbox=bbox,
+                        resolution=resolution,
+                        bands=bands,
+                        metadata=metadata
+                    )
+                    
+                    # Cache the result
+                    await self.cache_service.aset(
+                        cache_key, 
+                        satellite_image.__dict__, 
+                        ttl=3600  # 1 hour
+                    )
+                    
+                    return satellite_image
+                else:
+                    error_text = await _read_error_text(response)
+                    logger.error(f"Failed to get satellite image: {response.status} - {error_text}")
+                    return None
                         
         except Exception as e:
             logger.error(f"Error getting satellite image: {e}")
@@ -218,46 +650,8 @@ class SentinelHubService:
     
     def _get_evalscript(self, bands: List[str]) -> str:
         """Generate evalscript for Sentinel Hub processing"""
-        band_mapping = {
-            "B02": "B02",  # Blue
-            "B03": "B03",  # Green
-            "B04": "B04",  # Red
-            "B08": "B08",  # NIR
-            "B11": "B11",  # SWIR1
-            "B12": "B12"   # SWIR2
-        }
-        
-        # True color RGB evalscript
-        if set(bands) >= {"B02", "B03", "B04"}:
-            return """
-            //VERSION=3
-            function setup() {
-                return {
-                    input: ["B02", "B03", "B04"],
-                    output: { bands: 3 }
-                };
-            }
-            
-            function evaluatePixel(sample) {
-                return [sample.B04 * 2.5, sample.B03 * 2.5, sample.B02 * 2.5];
-            }
-            """
-        
-        # Default evalscript for any bands
-        band_inputs = ', '.join([f'"{band}"' for band in bands if band in band_mapping])
-        return f"""
-        //VERSION=3
-        function setup() {{
-            return {{
-                input: [{band_inputs}],
-                output: {{ bands: {len(bands)} }}
-            }};
-        }}
-        
-        function evaluatePixel(sample) {{
-            return [{', '.join([f'sample.{band}' for band in bands if band in band_mapping])}];
-        }}
-        """
+        key = tuple(bands)
+        return _EVALSCRIPTS.get(key) or _build_evalscript(key)
     
     async def analyze_satellite_image(
         self, 
@@ -268,43 +662,31 @@ class SentinelHubService:
         """
         Analyze satellite image for vegetation, built-up areas, etc.
         """
-        cache_key = f"sentinel_analysis:{':'.join(map(str, bbox))}:{date_from}:{date_to}"
+        cache_key = self._key("ana", bbox, date_from, date_to)
         
         # Check cache first
-        cached_result = await self.cache_service.get(cache_key)
+        cached_result = await self.cache_service.aget(cache_key)
         if cached_result:
-            return ImageAnalysis(**cached_result)
+            return _unpack_analyses(cached_result)[0]
         
+        # Identical concurrent misses share one upstream request
+        return await self._singleflight(
+            cache_key,
+            lambda: self._fetch_analysis(cache_key, bbox, date_from, date_to)
+        )
+    
+    async def _fetch_analysis(
+        self,
+        cache_key: str,
+        bbox: List[float],
+        date_from: str,
+        date_to: str
+    ) -> Optional[ImageAnalysis]:
+        """Run the analysis evalscript for one interval and cache the result"""
         try:
             access_token = await self._get_access_token()
             await self._ensure_rate_limit()
             
-            # NDVI and built-up analysis evalscript
-            evalscript = """
-            //VERSION=3
-            function setup() {
-                return {
-                    input: ["B02", "B03", "B04", "B08", "B11", "SCL"],
-                    output: { bands: 4 }
-                };
-            }
-            
-            function evaluatePixel(sample) {
-                // NDVI calculation
-                let ndvi = (sample.B08 - sample.B04) / (sample.B08 + sample.B04);
-                
-                // Built-up index (simplified)
-                let builtUp = (sample.B11 - sample.B08) / (sample.B11 + sample.B08);
-                
-                // Water detection (NDWI)
-                let water = (sample.B03 - sample.B08) / (sample.B03 + sample.B08);
-                
-                // Cloud mask from SCL
-                let cloud = sample.SCL === 9 || sample.SCL === 10 ? 1 : 0;
-                
-                return [ndvi, builtUp, water, cloud];
-            }
-            """
             
             payload = {
                 "input": {
@@ -331,7 +713,7 @@ class SentinelHubService:
                         "format": {"type": "image/tiff"}
                     }]
                 },
-                "evalscript": evalscript
+                "evalscript": _ANALYSIS_EVALSCRIPT
             }
             
             headers = {
@@ -339,35 +721,36 @@ class SentinelHubService:
                 'Content-Type': 'application/json'
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    self.process_url, 
-                    json=payload, 
-                    headers=headers
-                ) as response:
-                    if response.status == 200:
-                        # For now, return mock analysis data
-                        # In production, would process the TIFF data
-                        analysis = ImageAnalysis(
-                            vegetation_index=0.65,  # Mock NDVI
-                            built_up_area=0.25,     # Mock built-up percentage
-                            water_bodies=0.05,      # Mock water percentage
-                            bare_soil=0.05,         # Mock bare soil percentage
-                            cloud_coverage=10.0     # Mock cloud coverage
-                        )
-                        
-                        # Cache the result
-                        await self.cache_service.set(
-                            cache_key, 
-                            analysis.__dict__, 
-                            ttl=3600  # 1 hour
-                        )
-                        
-                        return analysis
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"Failed to analyze satellite image: {response.status} - {error_text}")
+            session = await self._get_session()
+            async with session.post(
+                self.process_url, 
+                json=payload, 
+                headers=headers
+            ) as response:
+                if response.status == 200:
+                    tiff_data = await response.read()
+                    
+                    # Bands: NDVI, built-up index, NDWI, cloud flag (float32)
+                    with MemoryFile(tiff_data) as memfile, memfile.open() as dataset:
+                        bands = dataset.read()
+                    
+                    analysis = _analysis_from_bands(bands[0], bands[1], bands[2], bands[3])
+                    if analysis is None:
+                        logger.warning("No valid pixels in satellite image analysis")
                         return None
+                    
+                    # Cache the result
+                    await self.cache_service.aset(
+                        cache_key, 
+                        _pack_analysis(analysis), 
+                        ttl=3600  # 1 hour
+                    )
+                    
+                    return analysis
+                else:
+                    error_text = await _read_error_text(response)
+                    logger.error(f"Failed to analyze satellite image: {response.status} - {error_text}")
+                    return None
                         
         except Exception as e:
             logger.error(f"Error analyzing satellite image: {e}")
@@ -383,73 +766,154 @@ class SentinelHubService:
         """
         Get time series analysis for change detection
         """
-        cache_key = f"sentinel_timeseries:{':'.join(map(str, bbox))}:{start_date}:{end_date}:{interval_days}"
+        cache_key = self._key("ts", bbox, start_date, end_date, interval_days)
         
-        # Check cache first
-        cached_result = await self.cache_service.get(cache_key)
+        # Check the in-process cache, then Redis
+        analyses = self._ts_memory_cache.get(cache_key)
+        if analyses is not None:
+            return list(analyses)
+        
+        cached_result = await self.cache_service.aget(cache_key)
         if cached_result:
-            return [ImageAnalysis(**item) for item in cached_result]
+            analyses = _unpack_analyses(cached_result)
+            self._ts_memory_cache[cache_key] = tuple(analyses)
+            return analyses
         
         try:
-            start_dt = datetime.strptime(start_date, "%Y-%m-%d")
-            end_dt = datetime.strptime(end_date, "%Y-%m-%d")
+            # Build all intervals up front so they can be fetched concurrently
+            intervals = _time_series_intervals(start_date, end_date, interval_days)
             
-            analyses = []
-            current_dt = start_dt
+            # One multi-temporal request for the whole range; per-interval requests as fallback
+            analyses = await self._analyze_time_series_batched(bbox, start_date, end_date, intervals)
+            if analyses is not None:
+                await self._cache_time_series(cache_key, analyses)
+                return analyses
             
-            while current_dt <= end_dt:
-                next_dt = current_dt + timedelta(days=interval_days)
-                if next_dt > end_dt:
-                    next_dt = end_dt
-                
-                analysis = await self.analyze_satellite_image(
-                    bbox,
-                    current_dt.strftime("%Y-%m-%d"),
-                    next_dt.strftime("%Y-%m-%d")
-                )
-                
-                if analysis:
-                    analyses.append(analysis)
-                
-                current_dt = next_dt + timedelta(days=1)
+            semaphore = asyncio.Semaphore(TIME_SERIES_CONCURRENCY)
             
-            # Cache the result
-            await self.cache_service.set(
-                cache_key, 
-                [analysis.__dict__ for analysis in analyses], 
-                ttl=7200  # 2 hours
+            async def analyze_interval(date_from: str, date_to: str) -> Optional[ImageAnalysis]:
+                async with semaphore:
+                    return await self.analyze_satellite_image(bbox, date_from, date_to)
+            
+            results = await asyncio.gather(
+                *(analyze_interval(date_from, date_to) for date_from, date_to in intervals),
+                return_exceptions=True
             )
             
+            analyses = []
+            for result in results:
+                if isinstance(result, Exception):
+                    logger.warning(f"Time series interval failed: {result}")
+                elif result:
+                    analyses.append(result)
+            
+            # Cache the result
+            await self._cache_time_series(cache_key, analyses)
+            
             return analyses
             
         except Exception as e:
             logger.error(f"Error getting time series analysis: {e}")
             return []
     
+    async def _cache_time_series(self, cache_key: str, analyses: List[ImageAnalysis]):
+        """Store a time series in both the in-process LRU and Redis"""
+        self._ts_memory_cache[cache_key] = tuple(analyses)
+        await self.cache_service.aset(
+            cache_key, 
+            b''.join(_pack_analysis(analysis) for analysis in analyses), 
+            ttl=TIME_SERIES_CACHE_TTL
+        )
+    
+    async def _analyze_time_series_batched(
+        self,
+        bbox: List[float],
+        start_date: str,
+        end_date: str,
+        intervals: List[Tuple[str, str]]
+    ) -> Optional[List[ImageAnalysis]]:
+        """
+        Analyse all intervals with a single multi-temporal Process API request
+        
+        Returns None if the request or its parsing fails, so the caller can
+        fall back to one request per interval.
+        """
+        try:
+            access_token = await self._get_access_token()
+            await self._ensure_rate_limit()
+            
+            payload = {
+                "input": {
+                    "bounds": {
+                        "bbox": bbox,
+                        "properties": {"crs": "http://www.opengis.net/def/crs/EPSG/0/4326"}
+                    },
+                    "data": [{
+                        "type": "sentinel-2-l2a",
+                        "dataFilter": {
+                            "timeRange": {
+                                "from": f"{start_date}T00:00:00Z",
+                                "to": f"{end_date}T23:59:59Z"
+                            },
+                            "maxCloudCoverage": 30.0
+                        }
+                    }]
+                },
+                "output": {
+                    "width": TIME_SERIES_RASTER_SIZE,
+                    "height": TIME_SERIES_RASTER_SIZE,
+                    "responses": [
+                        {"identifier": "default", "format": {"type": "image/tiff"}},
+                        {"identifier": "userdata", "format": {"type": "application/json"}}
+                    ]
+                },
+                "evalscript": _MULTITEMPORAL_EVALSCRIPT
+            }
+            
+            headers = {
+                'Authorization': f'Bearer {access_token}',
+                'Content-Type': 'application/json',
+                'Accept': 'application/tar'
+            }
+            
+            session = await self._get_session()
+            async with session.post(self.process_url, json=payload, headers=headers) as response:
+                if response.status != 200:
+                    error_text = await _read_error_text(response)
+                    logger.warning(f"Multi-temporal request rejected: {response.status} - {error_text}")
+                    return None
+                data = await response.read()
+            
+            dates, scenes = _parse_multitemporal_response(data)
+            
+            # Group acquisitions into the requested intervals
+            scene_dates = np.asarray(dates)
+            analyses = []
+            for date_from, date_to in intervals:
+                selected = scenes[(scene_dates >= date_from) & (scene_dates <= date_to)]
+                if not len(selected):
+                    continue
+                analysis = _analysis_from_bands(
+                    selected[:, 0], selected[:, 1], selected[:, 2], selected[:, 3]
+                )
+                if analysis:
+                    analyses.append(analysis)
+            
+            return analyses
+            
+        except Exception as e:
+            logger.warning(f"Multi-temporal time series analysis failed, falling back: {e}")
+            return None
+    
     # Synchronous wrappers for Flask compatibility
     def get_satellite_image_sync(self, *args, **kwargs) -> Optional[SatelliteImage]:
         """Synchronous wrapper for get_satellite_image"""
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            return loop.run_until_complete(self.get_satellite_image(*args, **kwargs))
-        finally:
-            loop.close()
+        return _run_sync(self.get_satellite_image(*args, **kwargs))
     
     def analyze_satellite_image_sync(self, *args, **kwargs) -> Optional[ImageAnalysis]:
         """Synchronous wrapper for analyze_satellite_image"""
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            return loop.run_until_complete(self.analyze_satellite_image(*args, **kwargs))
-        finally:
-            loop.close()
+        return _run_sync(self.analyze_satellite_image(*args, **kwargs))
     
     def get_time_series_analysis_sync(self, *args, **kwargs) -> List[ImageAnalysis]:
         """Synchronous wrapper for get_time_series_analysis"""
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            return loop.run_until_complete(self.get_time_series_analysis(*args, **kwargs))
-        finally:
-            loop.close()
+        return _run_sync(self.get_time_series_analysis(*args, **kwargs))
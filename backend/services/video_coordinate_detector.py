@@ -2,31 +2,188 @@ import os
 import logging
 import cv2
 import tempfile
-from typing import Dict, List, Any, Optional, Tuple
+import queue
+import threading
+from typing import Dict, Iterator, List, Any, Optional, Tuple
 import numpy as np
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
-from .coordinate_detector import CoordinateDetector
-from .cache_service import DetectionCache
+import hashlib
+from .coordinate_detector import get_shared_coordinate_detector
+from .cache_service import DetectionCache, cache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Optional batched decoder (decodes all sampled frames in one call, on the GPU when built with CUDA)
+try:
+    from decord import VideoReader, cpu, gpu
+    DECORD_AVAILABLE = True
+except ImportError:
+    DECORD_AVAILABLE = False
+    VideoReader = None
+
+# Bytes hashed from each end of a video for its cache fingerprint
+FINGERPRINT_CHUNK_SIZE = 64 * 1024
+VIDEO_RESULT_TTL = 3600  # 1 hour
+VIDEO_META_TTL = 86400  # 24 hours
+
+def _fast_file_fingerprint(path: str) -> str:
+    """
+    Content fingerprint of a file from its size and first/last 64 KiB.
+    Stable across paths, renames and re-uploads, without reading the whole video.
+    """
+    stat = os.stat(path)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(stat.st_size).encode())
+    
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        digest.update(os.pread(fd, FINGERPRINT_CHUNK_SIZE, 0))
+        if stat.st_size > FINGERPRINT_CHUNK_SIZE:
+            tail_offset = max(FINGERPRINT_CHUNK_SIZE, stat.st_size - FINGERPRINT_CHUNK_SIZE)
+            digest.update(os.pread(fd, FINGERPRINT_CHUNK_SIZE, tail_offset))
+    finally:
+        os.close(fd)
+    
+    return digest.hexdigest()
+
+# Optional JIT for the per-source coordinate scoring
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    njit = None
+
+def _score_sources_numpy(lats: np.ndarray, lons: np.ndarray, confs: np.ndarray,
+                         groups: np.ndarray, n_groups: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Per-source (counts, scores, lat stds, lon stds) with bincount reductions."""
+    # Spread from deviations around the group mean (E[x^2] - E[x]^2 loses
+    # precision at coordinate magnitudes)
+    counts = np.bincount(groups, minlength=n_groups).astype(np.float64)
+    conf_sums = np.bincount(groups, weights=confs, minlength=n_groups)
+    lat_means = np.bincount(groups, weights=lats, minlength=n_groups) / counts
+    lon_means = np.bincount(groups, weights=lons, minlength=n_groups) / counts
+    lat_stds = np.sqrt(np.bincount(groups, weights=(lats - lat_means[groups]) ** 2, minlength=n_groups) / counts)
+    lon_stds = np.sqrt(np.bincount(groups, weights=(lons - lon_means[groups]) ** 2, minlength=n_groups) / counts)
+    return counts, conf_sums / (1.0 + lat_stds + lon_stds), lat_stds, lon_stds
+
+def _score_sources_loop(lats, lons, confs, groups, n_groups):
+    """Same as _score_sources_numpy as two fused loops; compiled with numba when available."""
+    counts = np.zeros(n_groups)
+    conf_sums = np.zeros(n_groups)
+    lat_means = np.zeros(n_groups)
+    lon_means = np.zeros(n_groups)
+    for i in range(lats.shape[0]):
+        g = groups[i]
+        counts[g] += 1.0
+        conf_sums[g] += confs[i]
+        lat_means[g] += lats[i]
+        lon_means[g] += lons[i]
+    for g in range(n_groups):
+        lat_means[g] /= counts[g]
+        lon_means[g] /= counts[g]
+    
+    lat_stds = np.zeros(n_groups)
+    lon_stds = np.zeros(n_groups)
+    for i in range(lats.shape[0]):
+        g = groups[i]
+        lat_stds[g] += (lats[i] - lat_means[g]) ** 2
+        lon_stds[g] += (lons[i] - lon_means[g]) ** 2
+    
+    scores = np.empty(n_groups)
+    for g in range(n_groups):
+        lat_stds[g] = np.sqrt(lat_stds[g] / counts[g])
+        lon_stds[g] = np.sqrt(lon_stds[g] / counts[g])
+        scores[g] = conf_sums[g] / (1.0 + lat_stds[g] + lon_stds[g])
+    return counts, scores, lat_stds, lon_stds
+
+_score_sources = njit(cache=True)(_score_sources_loop) if NUMBA_AVAILABLE else _score_sources_numpy
+
+# Hardware decode (NVDEC/VAAPI/D3D11 via FFmpeg) where OpenCV and the host support it;
+# set VIDEO_HW_DECODE=0 to force software decoding
+HW_DECODE_ENABLED = os.getenv('VIDEO_HW_DECODE', '1') != '0' and hasattr(cv2, 'VIDEO_ACCELERATION_ANY')
+
+# FFmpeg decoder threads per capture (the detection workers need the remaining cores)
+DECODE_THREADS = int(os.getenv('VIDEO_DECODE_THREADS', str(min(4, os.cpu_count() or 1))))
+
+def _open_capture(video_path: str) -> cv2.VideoCapture:
+    """Open a video for decoding, preferring hardware acceleration and falling back to software."""
+    thread_params = [cv2.CAP_PROP_N_THREADS, DECODE_THREADS] if hasattr(cv2, 'CAP_PROP_N_THREADS') else []
+    if HW_DECODE_ENABLED:
+        try:
+            cap = cv2.VideoCapture(video_path, cv2.CAP_FFMPEG,
+                                   [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY] + thread_params)
+            if cap.isOpened():
+                return cap
+            cap.release()
+        except cv2.error as e:
+            logger.debug(f"Hardware-accelerated open failed for {video_path}: {str(e)}")
+    if thread_params:
+        cap = cv2.VideoCapture(video_path, cv2.CAP_ANY, thread_params)
+        if cap.isOpened():
+            return cap
+        cap.release()
+    return cv2.VideoCapture(video_path)
+
+# Frames whose dHash differs from the last kept frame by fewer bits are duplicates
+DUPLICATE_HASH_DISTANCE = 6
+
+# Mean absolute difference (0-255) of 64x64 grayscale thumbnails below which a frame counts as a duplicate
+DUPLICATE_DIFF_THRESHOLD = 8.0
+DUPLICATE_THUMB_SIZE = (64, 64)
+
+def _dhash(frame: np.ndarray) -> int:
+    """64-bit difference hash of a BGR frame (horizontal gradient signs of a 9x8 thumbnail)."""
+    gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    return int.from_bytes(np.packbits(small[:, 1:] > small[:, :-1]).tobytes(), 'big')
+
+def _frame_signature(frame: np.ndarray) -> Tuple[int, np.ndarray]:
+    """dHash and 64x64 grayscale thumbnail of a BGR frame, used for near-duplicate detection."""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    thumb = cv2.resize(gray, DUPLICATE_THUMB_SIZE, interpolation=cv2.INTER_AREA)
+    return _dhash(thumb), thumb
+
+# JPEG quality of frames handed to the detector (OpenCV defaults to 95)
+FRAME_JPEG_QUALITY = 85
+
+# Frame size used for the brightness/blur check
+QUALITY_CHECK_SIZE = (320, 240)
+
+# Decoded frames buffered between the reader thread and the quality check, per detection worker
+FRAME_PREFETCH_PER_WORKER = 2
+
 class VideoCoordinateDetector:
     """
     Service for analyzing video files to detect objects and determine coordinates.
     Extracts frames from video and processes them for geolocation.
     """
     
-    def __init__(self):
-        """Initialize the video coordinate detector."""
-        self.coordinate_detector = CoordinateDetector()
+    def __init__(self, duplicate_diff_threshold: float = DUPLICATE_DIFF_THRESHOLD):
+        """
+        Initialize the video coordinate detector.
+        
+        Args:
+            duplicate_diff_threshold: Mean thumbnail difference (0-255) below which a sampled
+                frame is skipped as a near-duplicate of the last accepted one; 0 disables the check
+        """
+        # Shared with the image endpoints so models are loaded once per process
+        self.coordinate_detector = get_shared_coordinate_detector()
         self.supported_formats = {'.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.webm'}
         
         # Frame quality filtering thresholds
         self.brightness_threshold = 30.0  # Minimum average brightness (0-255)
         self.sharpness_threshold = 100.0  # Minimum sharpness (blur detection)
+        self.duplicate_diff_threshold = duplicate_diff_threshold
+        
+        # Temporary frames go to tmpfs when available (no disk writeback)
+        self._tmp_root = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+        
+        # Per-thread scratch buffers for the quality check, reused across frames
+        self._tls = threading.local()
         
         logger.info("Video Coordinate Detector initialized")
     
@@ -43,9 +200,9 @@ class VideoCoordinateDetector:
             Dictionary with estimation data
         """
         try:
-            # Get video info
-            cap = cv2.VideoCapture(video_path)
-            if not cap.isOpened():
+            # Get video info (cached per video content, so no container probe on repeat calls)
+            video_info = self._get_video_info(video_path)
+            if video_info is None:
                 return {
                     'success': False,
                     'error': 'Could not open video file',
@@ -54,9 +211,9 @@ class VideoCoordinateDetector:
                 }
             
             # Get video properties
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            duration = total_frames / fps if fps > 0 else 0
+            total_frames = video_info['frame_count']
+            fps = video_info['fps']
+            duration = video_info['duration_seconds']
             
             # Calculate frames to process
             frames_to_process = min(max_frames, max(1, total_frames // frame_interval))
@@ -66,8 +223,6 @@ class VideoCoordinateDetector:
             estimated_time_per_frame = 2.5
             estimated_total_time = frames_to_process * estimated_time_per_frame
             
-            cap.release()
-            
             return {
                 'success': True,
                 'estimated_time': round(estimated_total_time, 1),
@@ -88,6 +243,17 @@ class VideoCoordinateDetector:
                 'frame_count': 0
             }
     
+    def _quality_buffers(self, shape: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return this thread's grayscale, downsampled and Laplacian buffers, reallocating on shape change."""
+        tls = self._tls
+        if getattr(tls, 'gray_buf', None) is None or tls.gray_buf.shape != shape:
+            tls.gray_buf = np.empty(shape, dtype=np.uint8)
+        if getattr(tls, 'small_buf', None) is None:
+            width, height = QUALITY_CHECK_SIZE
+            tls.small_buf = np.empty((height, width), dtype=np.uint8)
+            tls.lap_buf = np.empty((height, width), dtype=np.float32)
+        return tls.gray_buf, tls.small_buf, tls.lap_buf
+    
     def _is_frame_quality_acceptable(self, frame: np.ndarray, min_brightness: float = 30.0, 
                                    blur_threshold: float = 100.0) -> Tuple[bool, Dict[str, float]]:
         """
@@ -102,14 +268,19 @@ class VideoCoordinateDetector:
             Tuple of (is_acceptable, quality_metrics)
         """
         try:
-            # Convert to grayscale for analysis
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            # Convert to grayscale and downsample; blur and brightness are scale-robust
+            gray_buf, small_buf, lap_buf = self._quality_buffers(frame.shape[:2])
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=gray_buf)
+            small = cv2.resize(gray, QUALITY_CHECK_SIZE, dst=small_buf, interpolation=cv2.INTER_AREA)
             
             # Calculate brightness (average pixel intensity)
-            brightness = np.mean(gray)
+            gray_mean, _ = cv2.meanStdDev(small)
+            brightness = float(gray_mean[0, 0])
             
-            # Calculate sharpness using Laplacian variance
-            laplacian_var = cv2.Laplacian(gray, cv2.CV_64F).var()
+            # Calculate sharpness using Laplacian variance (stddev squared, one pass)
+            laplacian = cv2.Laplacian(small, cv2.CV_32F, dst=lap_buf, ksize=3)
+            _, laplacian_std = cv2.meanStdDev(laplacian)
+            laplacian_var = float(laplacian_std[0, 0]) ** 2
             
             # Check if frame meets quality criteria
             is_bright_enough = brightness >= min_brightness
@@ -132,7 +303,8 @@ class VideoCoordinateDetector:
             return True, {'error': str(e)}
     
     def analyze_video(self, video_path: str, location_hint: Optional[str] = None,
-                     frame_interval: int = 30, max_frames: int = 10) -> Dict[str, Any]:
+                     frame_interval: int = 30, max_frames: int = 10,
+                     target_max_side: int = 1280) -> Dict[str, Any]:
         """
         Analyze video file to detect objects and determine coordinates.
         
@@ -141,6 +313,8 @@ class VideoCoordinateDetector:
             location_hint: Optional location hint for better accuracy
             frame_interval: Extract every Nth frame (default: 30)
             max_frames: Maximum number of frames to process (default: 10)
+            target_max_side: Longest side frames are downscaled to before detection
+                (default: 1280; 0 keeps the source resolution)
             
         Returns:
             Dictionary with analysis results
@@ -148,71 +322,74 @@ class VideoCoordinateDetector:
         try:
             logger.info(f"Starting video analysis: {video_path}")
             
-            # Extract frames from video
-            frames_data = self._extract_frames(video_path, frame_interval, max_frames)
-            
-            if not frames_data['frames']:
+            # Results are keyed by video content, so copies at other paths share them
+            cache_key = None
+            fingerprint = None
+            try:
+                fingerprint = _fast_file_fingerprint(video_path)
+                hint_hash = hashlib.md5((location_hint or '').encode()).hexdigest()[:8]
+                cache_key = (f"video:{fingerprint}:{frame_interval}:{max_frames}:"
+                             f"{target_max_side}:{self.duplicate_diff_threshold}:{hint_hash}")
+            except OSError as e:
+                logger.warning(f"Could not fingerprint video {video_path}: {str(e)}")
+            
+            if cache_key:
+                cached_result = cache.get(cache_key)
+                if cached_result:
+                    logger.info(f"Cache hit for video analysis: {video_path}")
+                    return cached_result
+            
+            cap = _open_capture(video_path)
+            if not cap.isOpened():
                 return {
                     'success': False,
                     'error': 'No frames could be extracted from video',
-                    'video_info': frames_data['video_info']
+                    'video_info': {'error': 'Could not open video file'}
                 }
+            video_info = self._probe_video(cap)
+            if fingerprint:
+                cache.set(f"video_meta:{fingerprint}", video_info, VIDEO_META_TTL)
+            
+            # Pipeline: a reader thread decodes frames into a bounded queue while this
+            # thread quality-checks them and hands accepted frames to detection workers
+            # Determine optimal number of workers (max 4 to avoid overloading)
+            max_workers = max(1, min(4, max_frames, os.cpu_count() or 1))
+            
+            # Prefetch scales with the workers so decoding stays ahead without unbounded memory
+            frame_queue = queue.Queue(maxsize=FRAME_PREFETCH_PER_WORKER * max_workers)
+            stop_reading = threading.Event()
+            reader = threading.Thread(
+                target=self._read_frames,
+                args=(self._iter_frames(video_path, cap, frame_interval, max_frames, video_info, target_max_side),
+                      frame_queue, stop_reading),
+                daemon=True
+            )
             
-            # Filter frames by quality before processing
             quality_filtered_frames = []
             quality_stats = {
-                'total_frames': len(frames_data['frames']),
+                'total_frames': 0,
                 'filtered_frames': 0,
+                'duplicate_frames': 0,
                 'quality_metrics': []
             }
             
-            for frame_info in frames_data['frames']:
-                try:
-                    # Load frame for quality check
-                    frame = cv2.imread(frame_info['path'])
-                    if frame is None:
-                        logger.warning(f"Could not load frame: {frame_info['path']}")
-                        continue
-                    
-                    # Check frame quality
-                    is_acceptable, quality_metrics = self._is_frame_quality_acceptable(frame)
-                    quality_metrics['frame_number'] = frame_info['frame_number']
-                    quality_stats['quality_metrics'].append(quality_metrics)
-                    
-                    if is_acceptable:
-                        quality_filtered_frames.append(frame_info)
-                        logger.info(f"Frame {frame_info['frame_number']}: brightness={quality_metrics['brightness']:.1f}, sharpness={quality_metrics['sharpness']:.1f} - ACCEPTED")
-                    else:
-                        quality_stats['filtered_frames'] += 1
-                        logger.info(f"Frame {frame_info['frame_number']}: brightness={quality_metrics['brightness']:.1f}, sharpness={quality_metrics['sharpness']:.1f} - FILTERED OUT")
-                        
-                except Exception as e:
-                    logger.error(f"Error checking quality for frame {frame_info['frame_number']}: {str(e)}")
-                    # If quality check fails, include frame anyway
-                    quality_filtered_frames.append(frame_info)
-            
-            logger.info(f"Quality filtering: {len(quality_filtered_frames)}/{quality_stats['total_frames']} frames passed quality check")
+            # Only frames that pass the quality check are written out for the detector
+            temp_dir = tempfile.mkdtemp(prefix='video_frames_', dir=self._tmp_root)
             
-            if not quality_filtered_frames:
-                return {
-                    'success': False,
-                    'error': 'All frames were filtered out due to poor quality (too dark or blurry)',
-                    'video_info': frames_data['video_info'],
-                    'quality_stats': quality_stats
-                }
-            
-            # Process quality-filtered frames in parallel for better performance
             start_time = time.time()
             frame_results = []
             all_objects = []
             coordinate_candidates = []
+            success_count = 0
             
-            # Determine optimal number of workers (max 4 to avoid overloading)
-            max_workers = min(4, len(quality_filtered_frames), os.cpu_count() or 1)
-            
-            def process_single_frame(frame_info):
-                """Process a single frame and return results"""
+            def process_single_frame(frame_info, frame):
+                """Encode a single frame for the detector, process it and return results"""
                 try:
+                    # JPEG encoding runs here, in the worker, so the consumer keeps
+                    # pulling decoded frames (imwrite releases the GIL)
+                    self._write_frame(temp_dir, frame_info, frame)
+                    del frame
+                    
                     frame_result = self.coordinate_detector.detect_coordinates_from_image(
                         frame_info['path'], location_hint
                     )
@@ -229,6 +406,7 @@ class VideoCoordinateDetector:
                     
                     frame_result['timestamp'] = frame_info['timestamp']
                     frame_result['frame_number'] = frame_info['frame_number']
+                    frame_result['frame_scale'] = frame_info['scale']
                     return frame_result
                     
                 except Exception as e:
@@ -241,35 +419,91 @@ class VideoCoordinateDetector:
                         'timestamp': frame_info['timestamp'],
                         'frame_number': frame_info['frame_number']
                     }
+                finally:
+                    # The file only exists for the detector; free the tmpfs space right away
+                    self._cleanup_temp_frames([frame_info])
             
-            # Execute parallel processing on quality-filtered frames
             with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                # Submit all frame processing tasks
-                future_to_frame = {executor.submit(process_single_frame, frame_info): frame_info 
-                                 for frame_info in quality_filtered_frames}
-                
-                # Collect results as they complete
-                for future in as_completed(future_to_frame):
-                    frame_result = future.result()
-                    frame_results.append(frame_result)
-                    
-                    # Collect objects and coordinates
-                    if frame_result.get('success'):
-                        objects = frame_result.get('objects', [])
-                        if isinstance(objects, list):
-                            for obj in objects:
-                                if isinstance(obj, dict):
-                                    obj['frame_number'] = frame_result['frame_number']
-                                    obj['timestamp'] = frame_result['timestamp']
-                            all_objects.extend(objects)
+                pending = set()
+                last_hash = None
+                last_thumb = None
+                reader.start()
+                try:
+                    while True:
+                        frame_info = frame_queue.get()
+                        if frame_info is None:
+                            break
+                        quality_stats['total_frames'] += 1
                         
-                        coordinates = frame_result.get('coordinates')
-                        if coordinates and isinstance(coordinates, dict):
-                            coord = coordinates.copy()
-                            coord['frame_number'] = frame_result['frame_number']
-                            coord['timestamp'] = frame_result['timestamp']
-                            coordinate_candidates.append(coord)
+                        # Decoded frame is checked in memory and released once written
+                        frame = frame_info.pop('frame')
+                        try:
+                            # Skip frames that look the same as the last one sent to detection
+                            frame_hash, frame_thumb = _frame_signature(frame)
+                            if self._is_near_duplicate(frame_hash, frame_thumb, last_hash, last_thumb):
+                                quality_stats['duplicate_frames'] += 1
+                                logger.info(f"Frame {frame_info['frame_number']}: near-duplicate of previous frame - SKIPPED")
+                                continue
                             
+                            # Check frame quality
+                            is_acceptable, quality_metrics = self._is_frame_quality_acceptable(frame)
+                            quality_metrics['frame_number'] = frame_info['frame_number']
+                            quality_stats['quality_metrics'].append(quality_metrics)
+                            
+                            if is_acceptable:
+                                last_hash, last_thumb = frame_hash, frame_thumb
+                                quality_filtered_frames.append(frame_info)
+                                logger.info(f"Frame {frame_info['frame_number']}: brightness={quality_metrics['brightness']:.1f}, sharpness={quality_metrics['sharpness']:.1f} - ACCEPTED")
+                            else:
+                                quality_stats['filtered_frames'] += 1
+                                logger.info(f"Frame {frame_info['frame_number']}: brightness={quality_metrics['brightness']:.1f}, sharpness={quality_metrics['sharpness']:.1f} - FILTERED OUT")
+                                continue
+                                
+                        except Exception as e:
+                            logger.error(f"Error checking quality for frame {frame_info['frame_number']}: {str(e)}")
+                            # If quality check fails, include frame anyway
+                            if frame_info not in quality_filtered_frames:
+                                quality_filtered_frames.append(frame_info)
+                        
+                        # Detection starts while later frames are still being decoded
+                        pending.add(executor.submit(process_single_frame, frame_info, frame))
+                        
+                        # Aggregate whatever has finished while the reader is still decoding
+                        finished = {future for future in pending if future.done()}
+                        pending -= finished
+                        for future in finished:
+                            success_count += self._collect_frame_result(
+                                future.result(), frame_results, all_objects, coordinate_candidates
+                            )
+                finally:
+                    stop_reading.set()
+                    self._drain_frame_queue(frame_queue, reader)
+                
+                if not quality_stats['total_frames']:
+                    self._cleanup_temp_frames([], temp_dir)
+                    return {
+                        'success': False,
+                        'error': 'No frames could be extracted from video',
+                        'video_info': video_info
+                    }
+                
+                logger.info(f"Quality filtering: {len(quality_filtered_frames)}/{quality_stats['total_frames']} frames passed quality check")
+                
+                if not quality_filtered_frames:
+                    self._cleanup_temp_frames([], temp_dir)
+                    return {
+                        'success': False,
+                        'error': 'All frames were filtered out due to poor quality (too dark or blurry)',
+                        'video_info': video_info,
+                        'quality_stats': quality_stats
+                    }
+                
+                # Collect the remaining results as they complete
+                for future in as_completed(pending):
+                    success_count += self._collect_frame_result(
+                        future.result(), frame_results, all_objects, coordinate_candidates
+                    )
+            
             # Sort frame results by frame number to maintain order
             sorted_frame_results = sorted(frame_results, key=lambda x: x.get('frame_number', 0))
             processing_time = time.time() - start_time
@@ -291,11 +525,14 @@ class VideoCoordinateDetector:
                 'coordinates': best_coordinates,
                 'objects': all_objects,
                 'total_objects': len(all_objects),
+                'object_statistics': object_stats,
                 'frame_results': sorted_frame_results,
                 'total_frames_processed': len(frame_results),
+                'successful_frames': success_count,
                 'total_frames_extracted': quality_stats['total_frames'],
                 'frames_filtered_out': quality_stats['filtered_frames'],
-                'video_info': frames_data['video_info'],
+                'duplicate_frames_skipped': quality_stats['duplicate_frames'],
+                'video_info': video_info,
                 'processing_time_seconds': processing_time,
                 'coordinate_sources': coordinate_sources,
                 'confidence_score': confidence_score,
@@ -303,7 +540,10 @@ class VideoCoordinateDetector:
             }
             
             # Cleanup temporary frame files
-            self._cleanup_temp_frames(frames_data['frames'])
+            self._cleanup_temp_frames(quality_filtered_frames, temp_dir)
+            
+            if cache_key:
+                cache.set(cache_key, result, VIDEO_RESULT_TTL)
             
             return result
             
@@ -317,46 +557,98 @@ class VideoCoordinateDetector:
                 'total_objects': 0
             }
     
+    def _is_near_duplicate(self, frame_hash: int, frame_thumb: np.ndarray,
+                           last_hash: Optional[int], last_thumb: Optional[np.ndarray]) -> bool:
+        """Whether a frame matches the last accepted one by both dHash distance and thumbnail difference."""
+        if last_hash is None or (frame_hash ^ last_hash).bit_count() >= DUPLICATE_HASH_DISTANCE:
+            return False
+        # dHash alone collapses low-texture frames; confirm with the pixel difference
+        return float(cv2.absdiff(frame_thumb, last_thumb).mean()) < self.duplicate_diff_threshold
+    
+    def _collect_frame_result(self, frame_result: Dict, frame_results: List[Dict],
+                              all_objects: List[Dict], coordinate_candidates: List[Dict]) -> bool:
+        """Fold one frame's detection result into the aggregates; returns whether it succeeded."""
+        frame_results.append(frame_result)
+        if not frame_result.get('success'):
+            return False
+        
+        # Collect objects and coordinates
+        objects = frame_result.get('objects', [])
+        if isinstance(objects, list):
+            for obj in objects:
+                if isinstance(obj, dict):
+                    obj['frame_number'] = frame_result['frame_number']
+                    obj['timestamp'] = frame_result['timestamp']
+            all_objects.extend(objects)
+        
+        coordinates = frame_result.get('coordinates')
+        if coordinates and isinstance(coordinates, dict):
+            coord = coordinates.copy()
+            coord['frame_number'] = frame_result['frame_number']
+            coord['timestamp'] = frame_result['timestamp']
+            coordinate_candidates.append(coord)
+        return True
+    
     def _determine_best_coordinates(self, coordinate_candidates: List[Dict]) -> Optional[Dict]:
-        """Determine the best coordinates from multiple candidates."""
-        if not coordinate_candidates:
+        """
+        Determine the best coordinates from multiple candidates.
+        
+        Candidates are grouped by source and each source is scored by its total
+        confidence, penalised by how far its frames disagree (lat/lon spread).
+        The most confident candidate of the winning source is returned.
+        """
+        valid = [coord for coord in coordinate_candidates
+                 if coord and coord.get('latitude') and coord.get('longitude')]
+        if not valid:
             return None
         
-        # Simple implementation: return the first valid coordinate
-        # In a more sophisticated version, we could weight by confidence, consistency, etc.
-        for coord in coordinate_candidates:
-            if coord and coord.get('latitude') and coord.get('longitude'):
-                return coord
-        return None
+        # Structure-of-arrays view of the candidates
+        count = len(valid)
+        lats = np.fromiter((coord['latitude'] for coord in valid), dtype=np.float64, count=count)
+        lons = np.fromiter((coord['longitude'] for coord in valid), dtype=np.float64, count=count)
+        confs = np.fromiter((coord.get('confidence') or 0.0 for coord in valid), dtype=np.float64, count=count)
+        sources, groups = np.unique([str(coord.get('source', 'unknown')) for coord in valid], return_inverse=True)
+        groups = groups.ravel().astype(np.int64)
+        
+        counts, scores, lat_stds, lon_stds = _score_sources(lats, lons, confs, groups, len(sources))
+        best_group = int(np.argmax(scores))
+        
+        members = np.flatnonzero(groups == best_group)
+        best_index = int(members[np.argmax(confs[members])])
+        
+        # Report agreement from the spreads already used for scoring
+        # (1.0 = all frames agree; 0.5 at ~0.001 deg, roughly 100 m, of spread)
+        best = valid[best_index].copy()
+        best['consistency_score'] = float(1.0 / (1.0 + (lat_stds[best_group] + lon_stds[best_group]) * 1000.0))
+        best['frame_count'] = int(counts[best_group])
+        return best
     
     def _aggregate_object_statistics(self, all_objects: List[Dict]) -> Dict:
         """Aggregate statistics from all detected objects."""
-        if not all_objects:
+        objects = [obj for obj in all_objects if isinstance(obj, dict)]
+        if not objects:
             return {'category_counts': {}, 'category_avg_confidence': {}}
         
-        category_counts = {}
-        category_confidences = {}
+        # Single pass over the objects into parallel arrays, reductions in NumPy
+        count = len(objects)
+        categories = [str(obj.get('category', 'unknown')) for obj in objects]
+        confidences = np.fromiter((obj.get('confidence') or 0.0 for obj in objects), dtype=np.float64, count=count)
+        utilities = np.fromiter((obj.get('geolocation_utility') or 0.0 for obj in objects), dtype=np.float64, count=count)
         
-        for obj in all_objects:
-            if isinstance(obj, dict):
-                category = obj.get('category', 'unknown')
-                confidence = obj.get('confidence', 0.0)
-                
-                if category not in category_counts:
-                    category_counts[category] = 0
-                    category_confidences[category] = []
-                
-                category_counts[category] += 1
-                category_confidences[category].append(confidence)
+        unique_categories, inverse, counts = np.unique(categories, return_inverse=True, return_counts=True)
+        confidence_sums = np.bincount(inverse.ravel(), weights=confidences)
         
-        # Calculate average confidences
-        category_avg_confidence = {}
-        for category, confidences in category_confidences.items():
-            category_avg_confidence[category] = sum(confidences) / len(confidences) if confidences else 0.0
+        # Categories ordered by frequency (stable, so ties keep name order)
+        order = np.argsort(-counts, kind='stable')
         
         return {
-            'category_counts': category_counts,
-            'category_avg_confidence': category_avg_confidence
+            'category_counts': {str(unique_categories[i]): int(counts[i]) for i in order},
+            'category_avg_confidence': {
+                str(unique_categories[i]): float(confidence_sums[i] / counts[i]) for i in order
+            },
+            'top_categories': [str(unique_categories[i]) for i in order[:5]],
+            'avg_geolocation_utility': float(utilities.mean()),
+            'high_utility_objects': int(np.count_nonzero(utilities > 0.7))
         }
     
     def _analyze_coordinate_sources(self, coordinate_candidates: List[Dict]) -> Dict:
@@ -374,20 +666,19 @@ class VideoCoordinateDetector:
         
         return sources
     
+    def _mean_confidence(self, items: List[Dict]) -> float:
+        """Mean 'confidence' over the dict items (0.0 when there are none)."""
+        confidences = np.fromiter((item.get('confidence') or 0.0 for item in items if isinstance(item, dict)),
+                                  dtype=np.float64)
+        return float(confidences.mean()) if confidences.size else 0.0
+    
     def _calculate_confidence_score(self, coordinate_candidates: List[Dict], all_objects: List[Dict]) -> float:
         """Calculate overall confidence score."""
         if not coordinate_candidates and not all_objects:
             return 0.0
         
-        coord_confidence = 0.0
-        if coordinate_candidates:
-            confidences = [c.get('confidence', 0.0) for c in coordinate_candidates if isinstance(c, dict)]
-            coord_confidence = sum(confidences) / len(confidences) if confidences else 0.0
-        
-        obj_confidence = 0.0
-        if all_objects:
-            confidences = [o.get('confidence', 0.0) for o in all_objects if isinstance(o, dict)]
-            obj_confidence = sum(confidences) / len(confidences) if confidences else 0.0
+        coord_confidence = self._mean_confidence(coordinate_candidates)
+        obj_confidence = self._mean_confidence(all_objects)
         
         # Weighted average
         if coordinate_candidates and all_objects:
@@ -397,7 +688,13 @@ class VideoCoordinateDetector:
         else:
             return obj_confidence
     
-    def _cleanup_temp_frames(self, frames: List[Dict]):
+    def _write_frame(self, temp_dir: str, frame_info: Dict[str, Any], frame: np.ndarray):
+        """Write a frame for the path-based coordinate detector and record its path."""
+        frame_path = os.path.join(temp_dir, f"frame_{frame_info['frame_number']:06d}.jpg")
+        cv2.imwrite(frame_path, frame, [cv2.IMWRITE_JPEG_QUALITY, FRAME_JPEG_QUALITY])
+        frame_info['path'] = frame_path
+    
+    def _cleanup_temp_frames(self, frames: List[Dict], temp_dir: Optional[str] = None):
         """Clean up temporary frame files."""
         for frame_info in frames:
             try:
@@ -407,11 +704,193 @@ class VideoCoordinateDetector:
                     logger.debug(f"Cleaned up temporary frame: {frame_path}")
             except Exception as e:
                 logger.warning(f"Failed to cleanup frame {frame_info.get('path')}: {str(e)}")
+        
+        if temp_dir:
+            try:
+                os.rmdir(temp_dir)
+            except OSError as e:
+                logger.warning(f"Failed to remove temporary frame directory {temp_dir}: {str(e)}")
     
-    def _extract_frames(self, video_path: str, frame_interval: int = 30, max_frames: int = 10) -> Dict[str, Any]:
+    def _frame_entry(self, frame: np.ndarray, frame_number: int, fps: float,
+                     target_max_side: int = 0) -> Dict[str, Any]:
+        """
+        Describe an extracted frame; the decoded image stays in memory.
+        
+        Frames larger than target_max_side are downscaled, since the detectors
+        resize to well below that anyway; 'scale' maps frame pixels back to
+        source pixels (source = frame / scale).
+        """
+        scale = 1.0
+        height, width = frame.shape[:2]
+        if target_max_side and max(height, width) > target_max_side:
+            scale = target_max_side / max(height, width)
+            frame = cv2.resize(frame, (max(1, int(width * scale)), max(1, int(height * scale))),
+                               interpolation=cv2.INTER_AREA)
+        
+        return {
+            'frame': frame,
+            'frame_number': frame_number,
+            'timestamp': frame_number / fps if fps > 0 else 0,
+            'scale': scale
+        }
+    
+    def _extract_frames_decord(self, video_path: str, frame_interval: int, max_frames: int,
+                               fps: float, target_max_side: int = 0) -> List[Dict[str, Any]]:
+        """Decode all sampled frames with one decord batch call."""
+        try:
+            reader = VideoReader(video_path, ctx=gpu(0))
+        except Exception:
+            reader = VideoReader(video_path, ctx=cpu(0))
+        
+        indices = list(range(0, len(reader), frame_interval)[:max_frames])
+        if not indices:
+            return []
+        
+        # decord returns RGB; the rest of the pipeline works in OpenCV's BGR
+        batch = reader.get_batch(indices).asnumpy()
+        return [
+            self._frame_entry(cv2.cvtColor(frame, cv2.COLOR_RGB2BGR), frame_number, fps, target_max_side)
+            for frame_number, frame in zip(indices, batch)
+        ]
+    
+    def _probe_video(self, cap: cv2.VideoCapture) -> Dict[str, Any]:
+        """Read basic properties of an opened video."""
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        duration = frame_count / fps if fps > 0 else 0
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        
+        return {
+            'fps': fps,
+            'frame_count': frame_count,
+            'duration_seconds': duration,
+            'width': width,
+            'height': height
+        }
+    
+    def _get_video_info(self, video_path: str) -> Optional[Dict[str, Any]]:
+        """Video properties from the metadata cache, probing the file only on a miss."""
+        meta_key = None
+        try:
+            meta_key = f"video_meta:{_fast_file_fingerprint(video_path)}"
+            cached_info = cache.get(meta_key)
+            if cached_info:
+                return cached_info
+        except OSError as e:
+            logger.warning(f"Could not fingerprint video {video_path}: {str(e)}")
+        
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            return None
+        try:
+            video_info = self._probe_video(cap)
+        finally:
+            cap.release()
+        
+        if meta_key:
+            cache.set(meta_key, video_info, VIDEO_META_TTL)
+        return video_info
+    
+    def _iter_frames(self, video_path: str, cap: cv2.VideoCapture, frame_interval: int,
+                     max_frames: int, video_info: Dict[str, Any],
+                     target_max_side: int = 0) -> Iterator[Dict[str, Any]]:
+        """Yield sampled frames as they are decoded; releases the capture when done."""
+        fps = video_info['fps']
+        frame_count = video_info['frame_count']
+        
+        try:
+            if DECORD_AVAILABLE:
+                try:
+                    frames = self._extract_frames_decord(video_path, frame_interval, max_frames, fps, target_max_side)
+                except Exception as e:
+                    logger.warning(f"decord extraction failed, falling back to OpenCV: {str(e)}")
+                    frames = []
+                
+                if frames:
+                    yield from frames
+                    return
+            
+            # Seek straight to each sampled frame when the container allows it:
+            # only the GOP leading up to each target gets decoded
+            extracted = set()
+            seek_ok = frame_count > 0
+            for target in range(0, frame_count, frame_interval)[:max_frames] if seek_ok else ():
+                if not cap.set(cv2.CAP_PROP_POS_FRAMES, target) or \
+                        int(cap.get(cv2.CAP_PROP_POS_FRAMES)) != target:
+                    seek_ok = False
+                    break
+                
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                
+                extracted.add(target)
+                yield self._frame_entry(frame, target, fps, target_max_side)
+            
+            if not seek_ok:
+                # Seeking is unsupported or inaccurate for this codec: walk the stream
+                cap.release()
+                cap = _open_capture(video_path)
+                frame_number = 0
+                
+                # Bound locally: this loop runs once per frame of the video
+                grab = cap.grab
+                retrieve = cap.retrieve
+                frame_entry = self._frame_entry
+                add_extracted = extracted.add
+                interval = frame_interval
+                remaining = max_frames - len(extracted)
+                
+                # No sampled frame lies past the last target, so stop grabbing there
+                stop_frame = (max_frames - 1) * frame_interval
+                cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+                
+                while remaining > 0 and frame_number <= stop_frame:
+                    # grab() only demuxes; skipped frames are never decoded
+                    if not grab():
+                        break
+                    
+                    # Extract every frame_interval-th frame
+                    if frame_number % interval == 0 and frame_number not in extracted:
+                        ret, frame = retrieve()
+                        if ret:
+                            add_extracted(frame_number)
+                            remaining -= 1
+                            yield frame_entry(frame, frame_number, fps, target_max_side)
+                    
+                    frame_number += 1
+        finally:
+            cap.release()
+    
+    def _read_frames(self, frames: Iterator[Dict[str, Any]], frame_queue: queue.Queue,
+                     stop: threading.Event):
+        """Reader thread: push decoded frames into the queue, then a None sentinel."""
+        try:
+            for frame_info in frames:
+                if stop.is_set():
+                    break
+                frame_queue.put(frame_info)
+        except Exception as e:
+            logger.error(f"Error extracting frames: {str(e)}")
+        finally:
+            frames.close()
+            frame_queue.put(None)
+    
+    def _drain_frame_queue(self, frame_queue: queue.Queue, reader: threading.Thread):
+        """Unblock and wait for the reader thread after the consumer stops."""
+        while reader.is_alive() or not frame_queue.empty():
+            try:
+                frame_queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        reader.join()
+    
+    def _extract_frames(self, video_path: str, frame_interval: int = 30, max_frames: int = 10,
+                        target_max_side: int = 0) -> Dict[str, Any]:
         """Extract frames from video file."""
         try:
-            cap = cv2.VideoCapture(video_path)
+            cap = _open_capture(video_path)
             if not cap.isOpened():
                 return {
                     'frames': [],
@@ -419,53 +898,9 @@ class VideoCoordinateDetector:
                     'success': False
                 }
             
-            # Get video properties
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            duration = frame_count / fps if fps > 0 else 0
-            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            
-            video_info = {
-                'fps': fps,
-                'frame_count': frame_count,
-                'duration_seconds': duration,
-                'width': width,
-                'height': height
-            }
-            
-            frames = []
-            frame_number = 0
-            extracted_count = 0
-            
-            # Create temporary directory for frames
-            temp_dir = tempfile.mkdtemp()
-            
-            while extracted_count < max_frames:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                
-                # Extract every frame_interval-th frame
-                if frame_number % frame_interval == 0:
-                    timestamp = frame_number / fps if fps > 0 else 0
-                    frame_filename = f"frame_{frame_number:06d}.jpg"
-                    frame_path = os.path.join(temp_dir, frame_filename)
-                    
-                    # Save frame
-                    cv2.imwrite(frame_path, frame)
-                    
-                    frames.append({
-                        'path': frame_path,
-                        'frame_number': frame_number,
-                        'timestamp': timestamp
-                    })
-                    
-                    extracted_count += 1
-                
-                frame_number += 1
-            
-            cap.release()
+            video_info = self._probe_video(cap)
+            frames = list(self._iter_frames(video_path, cap, frame_interval, max_frames, video_info, target_max_side))
+            frames.sort(key=lambda frame_info: frame_info['frame_number'])
             
             return {
                 'frames': frames,
@@ -4,6 +4,7 @@ from typing import Dict, List, Any, Optional, Tuple
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 import torch
+from torch import nn
 from torchvision import transforms
 from torchvision.models.detection import fasterrcnn_resnet50_fpn
 from torchvision.models.detection.faster_rcnn import FastRCNNPredictor
@@ -12,6 +13,15 @@ from torchvision.models.detection.faster_rcnn import FastRCNNPredictor
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Mixed-precision (FP16) inference on CUDA; set VIOLATION_FP16=0 to run in FP32
+FP16_ENABLED = os.getenv('VIOLATION_FP16', '1') != '0'
+
+# torch.compile on CUDA (opt-in: detection inputs vary in size and trigger recompiles)
+TORCH_COMPILE_ENABLED = os.getenv('VIOLATION_TORCH_COMPILE', '0') == '1' and hasattr(torch, 'compile')
+
+# Dynamic INT8 quantization of the box head's linear layers on CPU; set VIOLATION_CPU_INT8=0 to disable
+CPU_INT8_ENABLED = os.getenv('VIOLATION_CPU_INT8', '1') != '0'
+
 class ViolationDetector:
     """
     Service for detecting property violations in images using computer vision.
@@ -39,10 +49,15 @@ class ViolationDetector:
             model_path: Path to a pre-trained model. If None, uses a default model.
         """
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+        self.use_fp16 = FP16_ENABLED and self.device.type == 'cuda'
         self.model = self._load_model(model_path)
         self.transform = transforms.Compose([
             transforms.ToTensor(),
         ])
+        
+        if TORCH_COMPILE_ENABLED and self.device.type == 'cuda':
+            # Trigger compilation now rather than on the first request
+            self.warm_up()
     
     def _load_model(self, model_path: Optional[str] = None):
         """Load the detection model."""
@@ -62,12 +77,38 @@ class ViolationDetector:
             
             model = model.to(self.device)
             model.eval()
+            
+            if self.device.type == 'cuda':
+                if TORCH_COMPILE_ENABLED:
+                    model = torch.compile(model, mode='reduce-overhead')
+                    logger.info("Model compiled with torch.compile")
+            elif CPU_INT8_ENABLED:
+                # fc6/fc7 dominate the ROI head; the predictor stays FP32 to keep box precision
+                model.roi_heads.box_head = torch.ao.quantization.quantize_dynamic(
+                    model.roi_heads.box_head, {nn.Linear}, dtype=torch.qint8
+                )
+                logger.info("Box head quantized to INT8 for CPU inference")
+            
             return model
             
         except Exception as e:
             logger.error(f"Error loading model: {e}")
             raise
     
+    def _infer(self, image_tensor: torch.Tensor) -> List[Dict[str, torch.Tensor]]:
+        """Run the model, under FP16 autocast on CUDA."""
+        with torch.inference_mode(), torch.autocast(device_type=self.device.type, dtype=torch.float16,
+                                                    enabled=self.use_fp16):
+            return self.model(image_tensor)
+    
+    def warm_up(self):
+        """Run one dummy inference so weights, kernels and compiled graphs are ready before the first request."""
+        try:
+            self._infer(torch.zeros((1, 3, 64, 64), device=self.device))
+            logger.info("Violation detector warmed up")
+        except Exception as e:
+            logger.warning(f"Violation detector warm-up failed: {e}")
+    
     def preprocess_image(self, image_path: str) -> torch.Tensor:
         """Preprocess image for the model."""
         try:
@@ -109,8 +150,7 @@ class ViolationDetector:
             result['image_size'] = original_image.size  # (width, height)
             
             # Run inference
-            with torch.no_grad():
-                predictions = self.model(image_tensor)
+            predictions = self._infer(image_tensor)
             
             # Process predictions
             detections = self._process_predictions(predictions[0], original_image.size)
@@ -1,9 +1,15 @@
 """XLSX Exporter для ТЗ ЛЦТ 2025"""
 
-import pandas as pd
+import xlsxwriter
 from datetime import datetime
 from pathlib import Path
-from models import Photo, Violation
+from sqlalchemy import null
+from models import db, Photo, Violation
+
+# Строки читаются из БД порциями, а не загружаются целиком
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_COLUMNS = ('ID', 'Файл', 'Категория', 'Уверенность', 'Широта', 'Долгота', 'Источник', 'Дата')
 
 class XLSXExporter:
     def __init__(self):
@@ -11,26 +17,38 @@ class XLSXExporter:
         self.output_dir.mkdir(exist_ok=True)
     
     def export_violations(self) -> str:
-        """Экспорт нарушений в XLSX"""
-        violations = Violation.query.join(Photo).all()
-        
-        data = []
-        for v in violations:
-            data.append({
-                'ID': v.id,
-                'Файл': v.photo.file_path,
-                'Категория': v.category,
-                'Уверенность': f"{v.confidence * 100:.1f}%",
-                'Широта': v.photo.latitude,
-                'Долгота': v.photo.longitude,
-                'Источник': v.source,
-                'Дата': v.created_at.strftime("%Y-%m-%d %H:%M:%S")
-            })
-        
-        df = pd.DataFrame(data)
+        """Экспорт нарушений в XLSX (потоковая запись, постоянный расход памяти)"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"violations_{timestamp}.xlsx"
         file_path = self.output_dir / filename
         
-        df.to_excel(file_path, index=False)
+        workbook = xlsxwriter.Workbook(str(file_path), {
+            'constant_memory': True,
+            'default_date_format': 'yyyy-mm-dd hh:mm:ss'
+        })
+        try:
+            worksheet = workbook.add_worksheet()
+            header_format = workbook.add_format({'bold': True})
+            # Уверенность и дата форматируются Excel, без strftime на каждую строку
+            worksheet.set_column(3, 3, None, workbook.add_format({'num_format': '0.0%'}))
+            worksheet.set_column(7, 7, 20)
+            worksheet.write_row(0, 0, EXPORT_COLUMNS, header_format)
+            
+            # Только нужные колонки одним запросом: без ORM-объектов и ленивой загрузки v.photo
+            rows = db.session.query(
+                Violation.id,
+                Photo.file_path,
+                Violation.category,
+                Violation.confidence,
+                Photo.lat,
+                Photo.lon,
+                getattr(Violation, 'source', null()),
+                Violation.created_at
+            ).join(Photo, Violation.photo_id == Photo.id).yield_per(EXPORT_BATCH_SIZE)
+            
+            for row, values in enumerate(rows, start=1):
+                worksheet.write_row(row, 0, tuple(values))
+        finally:
+            workbook.close()
+        
         return str(file_path)
@@ -152,20 +152,7 @@ class YOLOObjectDetector:
             )
             
             # Поиск похожих объектов в датасете для дообучения
-            dataset_matches = []
-            enhanced_objects = []
-            
-            for obj in objects:
-                # Улучшаем детекцию с помощью датасета
-                if obj['category'] in ['building', 'garbage']:
-                    training_data = self.dataset_search.get_training_data(obj['category'])
-                    if training_data:
-                        # Повышаем уверенность если есть эталонные данные
-                        obj['confidence'] = min(0.95, obj['confidence'] + 0.1)
-                        obj['dataset_enhanced'] = True
-                        dataset_matches.extend(training_data[:3])
-                
-                enhanced_objects.append(obj)
+            enhanced_objects, dataset_matches = self._enhance_with_dataset(objects)
             
             # Валидация через готовую базу данных заказчика
             validation_result = None
@@ -207,6 +194,25 @@ class YOLOObjectDetector:
                 'total_objects': 0
             }
     
+    def _enhance_with_dataset(self, objects: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict]]:
+        """Raise confidence of objects that have reference training data; returns (objects, dataset_matches)."""
+        dataset_matches = []
+        enhanced_objects = []
+        
+        for obj in objects:
+            # Улучшаем детекцию с помощью датасета
+            if obj['category'] in ['building', 'garbage']:
+                training_data = self.dataset_search.get_training_data(obj['category'])
+                if training_data:
+                    # Повышаем уверенность если есть эталонные данные
+                    obj['confidence'] = min(0.95, obj['confidence'] + 0.1)
+                    obj['dataset_enhanced'] = True
+                    dataset_matches.extend(training_data[:3])
+            
+            enhanced_objects.append(obj)
+        
+        return enhanced_objects, dataset_matches
+    
     def _process_detections(self, results, image_shape) -> List[Dict[str, Any]]:
         """Process YOLOv8 detection results into object format for geolocation."""
         objects = []
@@ -484,12 +490,14 @@ class YOLOObjectDetector:
                     
                     objects = self._process_detections(result, image.shape)
                     annotated_image_path = self._create_annotated_image(image_path, objects)
+                    objects, dataset_matches = self._enhance_with_dataset(objects)
                     
                     results.append({
                         'success': True,
                         'objects': objects,
                         'total_objects': len(objects),
                         'annotated_image_path': annotated_image_path,
+                        'dataset_matches': dataset_matches,
                         'image_path': image_path
                     })
                     
@@ -76,3 +76,11 @@ def search_2gis(self, query, api_key):
         return response.json()
     except Exception as e:
         raise self.retry(exc=e, countdown=60, max_retries=3)
+
+# Warm the satellite tile cache for the service area
+@celery.task(bind=True)
+def prime_satellite_tile_cache(self, min_zoom=4, max_zoom=8):
+    """Pre-fetch low-zoom satellite tiles into the Roscosmos tile cache."""
+    from services.roscosmos_satellite_service import RoscosmosService
+    
+    return RoscosmosService().prime_cache(min_zoom=min_zoom, max_zoom=max_zoom)